@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of the display line encoder.
+
+Compares encoding.encode_line against the per-pixel loop Element used before,
+for single rows and for a full 360x96 page.
+
+    python -m benchmarks.encoder
+"""
+import random
+import timeit
+
+from mpc_studio_display.display import DISPLAY_WIDTH, DISPLAY_HEIGHT
+from mpc_studio_display.encoding import encode_line, encode_frame, numpy
+from mpc_studio_display.graphics import PIXEL_ON
+
+
+def legacy_encode_line(line):
+    arr = []
+    bit = 0x00
+    bitmap = [0x30, 0x0C, 0x03]
+    for i, pixel in enumerate(line):
+        stride = i % 3
+        if pixel:
+            bit = bit | bitmap[stride]
+        else:
+            bit = bit | 0x00
+        if stride == 2 and i > 0:
+            arr.append(bit)
+            bit = 0x00
+    return arr
+
+
+def random_frame(width, height, seed=0):
+    rng = random.Random(seed)
+    return bytearray(rng.getrandbits(1) * PIXEL_ON for _ in range(width * height))
+
+
+def report(name, seconds, number):
+    print(f"{name:<32} {seconds / number * 1e6:10.2f} us")
+
+
+def main(number=200):
+    frame = random_frame(DISPLAY_WIDTH, DISPLAY_HEIGHT)
+    rows = [frame[y * DISPLAY_WIDTH:(y + 1) * DISPLAY_WIDTH] for y in range(DISPLAY_HEIGHT)]
+
+    for row in rows:
+        assert bytes(legacy_encode_line(row)) == encode_line(row)
+    assert b"".join(encode_frame(frame, DISPLAY_WIDTH, DISPLAY_HEIGHT, use_numpy=False)) == b"".join(
+        encode_line(row) for row in rows
+    )
+
+    row = rows[0]
+    report("legacy row", timeit.timeit(lambda: legacy_encode_line(row), number=number), number)
+    report("table row", timeit.timeit(lambda: encode_line(row), number=number), number)
+    report(
+        "legacy page (row by row)",
+        timeit.timeit(lambda: [legacy_encode_line(r) for r in rows], number=number // 10),
+        number // 10,
+    )
+    report("table page (row by row)", timeit.timeit(lambda: [encode_line(r) for r in rows], number=number), number)
+    report(
+        "table page (whole frame)",
+        timeit.timeit(lambda: encode_frame(frame, DISPLAY_WIDTH, DISPLAY_HEIGHT, use_numpy=False), number=number),
+        number,
+    )
+    if numpy is not None:
+        report(
+            "numpy page (whole frame)",
+            timeit.timeit(lambda: encode_frame(frame, DISPLAY_WIDTH, DISPLAY_HEIGHT, use_numpy=True), number=number),
+            number,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares the MIDI output backends for display messages.
+
+Full page repaints are sent through RtMidiOutput and MidoOutput. By default both write to a port that
+discards the bytes, so only the cost on our side of the port is measured: mido builds and validates
+a Message for every row and converts it back to bytes, the rtmidi backend hands over the buffer
+the row was assembled in. Pass --port to send to a real output instead.
+
+    python -m benchmarks.output
+    python -m benchmarks.output --port "MPC Studio Black MPC Private"
+"""
+import argparse
+import statistics
+import time
+
+from mpc_studio_display.display import DISPLAY_HEIGHT
+from mpc_studio_display.midi_output import RtMidiOutput, MidoOutput, open_display_output, mido
+from .rig import Rig
+
+
+class DiscardingMidiOut:
+    """
+    Stands in for rtmidi.MidiOut and drops every message.
+    """
+
+    def send_message(self, message):
+        pass
+
+    def close_port(self):
+        pass
+
+
+class DiscardingMidoPort:
+    """
+    Stands in for a mido output port. Converts messages to bytes, as mido's rtmidi port does before
+    handing them to rtmidi, then drops them.
+    """
+
+    def __init__(self) -> None:
+        self.midi_out = DiscardingMidiOut()
+
+    def send(self, msg):
+        self.midi_out.send_message(msg.bytes())
+
+    def close(self):
+        pass
+
+
+def repaint_times(output, iterations):
+    """
+    :return: The time of each full repaint of the session page, in seconds.
+    :rtype: List[float]
+    """
+    times = []
+    for _ in range(iterations):
+        rig = Rig(send_payload=output.send_payload)
+        start = time.perf_counter()
+        rig.show_page("session")
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def send_times(output, iterations):
+    """
+    :return: The time of sending the rows of a full page, one message per row, without rendering, in seconds.
+    :rtype: List[float]
+    """
+    messages = []
+    rig = Rig(send_payload=lambda payload: messages.append(payload.copy()))
+    rig.show_page("session")
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for message in messages:
+            output.send_payload(message)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--port", help="send to this MIDI output instead of discarding")
+    args = parser.parse_args(argv)
+
+    outputs = []
+    if args.port:
+        for backend in ("rtmidi", "mido"):
+            try:
+                outputs.append(open_display_output(args.port, backend))
+            except ImportError as error:
+                print(f"{backend}: skipped, {error}")
+    else:
+        outputs.append(RtMidiOutput(DiscardingMidiOut()))
+        if mido is not None:
+            outputs.append(MidoOutput(DiscardingMidoPort()))
+        else:
+            print("mido: skipped, mido is not installed")
+
+    print(f"{'backend':<10} {'repaint ms':>12} {'send page ms':>16} {'per row us':>12}")
+    for output in outputs:
+        repaint = statistics.median(repaint_times(output, args.iterations)) * 1e3
+        send = statistics.median(send_times(output, args.iterations)) * 1e3
+        print(f"{output.name:<10} {repaint:>12.3f} {send:>16.3f} {send / DISPLAY_HEIGHT * 1e3:>12.2f}")
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
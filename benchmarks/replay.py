@@ -0,0 +1,91 @@
+"""
+Replays a recorded session against the DisplayEmulator and reports latency and traffic.
+
+Record a session by running main.py with MPC_RECORD set to a file name, or generate a synthetic one:
+
+    python -m benchmarks.replay --generate session.log
+    python -m benchmarks.replay session.log
+    python -m benchmarks.replay session.log --speed 1
+"""
+import argparse
+import asyncio
+import io
+import random
+
+from mpc_studio_display.recorder import SessionReplayer, LogEntry, INPUT, ENTRY_HEADER, LOG_MAGIC
+from .rig import Rig, PAD_MAP
+
+
+def generate_session(seed=0, seconds=60.0):
+    """
+    Returns the log of a made up session: page switches, pad presses and encoder spins at a human pace.
+
+    :rtype: bytes
+    """
+    rng = random.Random(seed)
+    pads = list(PAD_MAP)
+    entries = [LogEntry(INPUT, 0.0, bytes((144, 50, 127)))]
+    now = 0.0
+    while now < seconds:
+        now += rng.uniform(0.2, 1.5)
+        action = rng.random()
+        if action < 0.1:
+            entries.append(LogEntry(INPUT, now, bytes((144, rng.choice((3, 2, 50)), 127))))
+        elif action < 0.4:
+            entries.append(LogEntry(INPUT, now, bytes((0x99, rng.choice(pads), 100))))
+        else:
+            # A spin of the browser or volume encoder, one message per detent
+            control = rng.choice((16, 101))
+            value = 1 if rng.random() < 0.6 else 127
+            for _ in range(rng.randint(1, 30)):
+                now += rng.uniform(0.005, 0.03)
+                entries.append(LogEntry(INPUT, now, bytes((0xB0, control, value))))
+    out = io.BytesIO()
+    out.write(LOG_MAGIC)
+    last = 0
+    for entry in entries:
+        elapsed = int(entry.time * 1e6)
+        out.write(ENTRY_HEADER.pack(entry.kind, elapsed - last, len(entry.data)))
+        out.write(entry.data)
+        last = elapsed
+    return out.getvalue()
+
+
+def replay(replayer, speed=None):
+    rig = Rig()
+    runtime = rig.create_runtime()
+    result = asyncio.run(replayer.play(runtime, speed))
+    result.update(rig.emulator.stats())
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?")
+    parser.add_argument("--speed", type=float, default=None, help="playback speed, runs flat out by default")
+    parser.add_argument("--generate", metavar="PATH", help="write a synthetic session log")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        with open(args.generate, "wb") as f:
+            f.write(generate_session(args.seed))
+        return
+    if not args.log:
+        parser.error("a session log is required")
+
+    replayer = SessionReplayer.load(args.log)
+    result = replay(replayer, args.speed)
+    recorded = replayer.outputs
+    print(f"session          {replayer.duration:10.2f} s, {result['inputs']} inputs, {result['ticks']} ticks")
+    print(f"wall time        {result['wall_time']:10.3f} s")
+    print(f"tick median      {result['tick_median'] * 1e3:10.3f} ms")
+    print(f"tick max         {result['tick_max'] * 1e3:10.3f} ms")
+    print(f"messages         {result['messages']:10d}")
+    print(f"bytes            {result['bytes']:10d}")
+    if recorded:
+        print(f"recorded         {len(recorded):10d} messages, {sum(len(entry.data) for entry in recorded)} payload bytes")
+
+
+if __name__ == "__main__":
+    main()
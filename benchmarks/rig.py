@@ -0,0 +1,125 @@
+"""
+The display set up the way main.py does it, rendering into a DisplayEmulator instead of the device.
+"""
+from mpc_studio_display.display import Display, Page
+from mpc_studio_display.runtime import ControllerRuntime
+from mpc_studio_display.emulator import DisplayEmulator
+from mpc_studio_display.browser_api import BrowserItem, Browser
+from mpc_studio_display.browser_page import create_browser_page
+from mpc_studio_display.elements.text_element import TextElement
+from mpc_studio_display.transport_section import TransportSection
+from mpc_studio_display.session_section import SessionSection, TrackDetailsSection
+
+
+PAD_MAP = {
+    49: (0, 0), 55: (1, 0), 51: (2, 0), 53: (3, 0),
+    48: (0, 1), 47: (1, 1), 45: (2, 1), 43: (3, 1),
+    40: (0, 2), 38: (1, 2), 46: (2, 2), 44: (3, 2),
+    37: (0, 3), 36: (1, 3), 42: (2, 3), 82: (3, 3),
+}
+
+
+def create_browser(folders=40, sub_folders=30, devices=15):
+    root = BrowserItem("Root", is_folder=True)
+    for i in range(folders):
+        folder = BrowserItem(f"Folder {i}", is_folder=True)
+        for j in range(sub_folders):
+            subfolder = BrowserItem(f"Sub Folder {i}-{j}", is_folder=True)
+            for k in range(devices):
+                subfolder.add_child(BrowserItem(f"Device {i}-{j}-{k}", is_device=True, is_loadable=True))
+            folder.add_child(subfolder)
+        root.add_child(folder)
+    return Browser(root, lines=6)
+
+
+class Rig:
+    """
+    Pages, browser and display of main.py. Nothing is shown until show_page is called.
+
+    :param send_payload: Receives the payloads, defaults to a new DisplayEmulator.
+    :type send_payload
+    """
+
+    def __init__(self, send_payload=None) -> None:
+        self.emulator = DisplayEmulator() if send_payload is None else None
+        self.transport = TransportSection()
+        self.session = SessionSection()
+        self.track_details_section = TrackDetailsSection()
+        self.browser_page = create_browser_page()
+        self.session_page = Page("session")
+        self.session_page.add_element(self.transport)
+        self.session_page.add_element(self.session)
+        self.session_page.add_element(self.track_details_section)
+        self.mixer_page = Page("mixer")
+        self.mixer_page.add_element(TextElement("mixer_title", "Mixer", 0, 0, 60, 12, selected=True))
+
+        self.display = Display(send_payload=send_payload if send_payload is not None else self.emulator)
+        self.display.add_page("session", self.session_page)
+        self.display.add_page("mixer", self.mixer_page)
+        self.display.add_page("browser", self.browser_page)
+        self.display.initialize()
+        self.browser = create_browser(folders=40, sub_folders=2, devices=2)
+        self.volume = 64
+
+    def create_runtime(self):
+        """
+        Returns a ControllerRuntime with the handlers and encoders of main.py. The encoder handlers
+        do not flush, the runtime's tick does.
+        """
+        runtime = ControllerRuntime(self.display)
+        runtime.add_handler(self.handle_message)
+        runtime.add_encoder(16, lambda amount: self.change_volume(amount, flush=False))
+        runtime.add_encoder(101, lambda amount: self.scroll_browser(amount, flush=False))
+        return runtime
+
+    def handle_message(self, msg):
+        data = msg.bytes()
+        if data == [144, 3, 127]:
+            self.display.show_page("session")
+        elif data == [144, 2, 127]:
+            self.display.show_page("mixer")
+        elif data == [144, 50, 127]:
+            self.display.show_page("browser")
+        if data[0] & 0x0F == 0x9 and len(data) > 1:
+            coordinates = PAD_MAP.get(data[1])
+            if coordinates:
+                self.select_pad(*coordinates)
+
+    def show_page(self, name):
+        self.display.show_page(name)
+        self.display.flush()
+
+    def select_pad(self, track_index, clip_index):
+        with self.display.batch():
+            for i, track in enumerate(self.session.tracks):
+                if i == track_index:
+                    track.state = 2
+                    track.select_clip(clip_index)
+                    self.track_details_section.track_name.text = track.track_name_element.text
+                else:
+                    track.state = 1
+
+    def update_browser_sidebar_menu(self, flush=True):
+        lines_text = []
+        selected_line_index = 0
+        for i, item in enumerate(self.browser.get_current_frame()):
+            if item["index"] == self.browser.get_selected_index():
+                selected_line_index = i
+            lines_text.append(item["item"].name)
+        self.browser_page.BrowserSidebarMenu.set_lines_text(lines_text, selected_line_index=selected_line_index)
+        if flush:
+            self.display.flush()
+
+    def scroll_browser(self, amount, flush=True):
+        self.browser.move_selection(amount)
+        self.update_browser_sidebar_menu(flush)
+
+    def change_volume(self, amount, flush=True):
+        self.volume = max(0, min(127, self.volume + amount))
+        self.track_details_section.meter_element.set_volume_from_midi(self.volume)
+        if flush:
+            self.display.flush()
+
+    def set_meters(self, left, right):
+        self.track_details_section.meter_element.set_meters(left, right)
+        self.display.flush()
@@ -0,0 +1,197 @@
+"""
+Render and transport benchmarks, run against the headless DisplayEmulator.
+
+Every case reports the median and 95th percentile wall time of one interaction, and the sysex
+messages and bytes it sends. Results can be stored as a baseline and later runs checked against it,
+so regressions in bytes per interaction or latency are caught before they reach a controller.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --check benchmarks/baseline.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from mpc_studio_display.display import DISPLAY_WIDTH, DISPLAY_HEIGHT
+from mpc_studio_display.encoding import encode_frame
+from mpc_studio_display.graphics import ImageSection, PngDrawing, text_strip_cache, PIXEL_ON
+from .rig import Rig
+
+
+class Case:
+    """
+    A benchmark case. action(rig, i) is timed once per iteration, setup(rig) is not timed.
+
+    :param fresh: Build a new Rig and run setup before every iteration instead of once.
+    :type fresh
+    :param uses_rig: False for cases that do not touch the display.
+    :type uses_rig
+    """
+
+    def __init__(self, name, action, setup=None, fresh=False, uses_rig=True) -> None:
+        self.name = name
+        self.action = action
+        self.setup = setup
+        self.fresh = fresh
+        self.uses_rig = uses_rig
+
+
+PAD_SEQUENCE = [(0, 0), (2, 1), (1, 3), (3, 2)]
+PAGE_SEQUENCE = ["session", "mixer", "browser"]
+SAMPLE_TEXT = ["Sub Folder 12-3", "Device 4-1-7", "Folder 39", "Track Name", "121.00"]
+
+
+def show(name):
+    return lambda rig: rig.show_page(name)
+
+
+def scroll(rig, i):
+    # Two steps down for every step up, so the selection keeps moving through the list
+    rig.scroll_browser(-1 if i % 3 == 2 else 1)
+
+
+def meters(rig, i):
+    rng = random.Random(i)
+    rig.set_meters(rng.random(), rng.random())
+
+
+def draw_text(image, i):
+    image.clear()
+    PngDrawing.draw_text(image, SAMPLE_TEXT[i % len(SAMPLE_TEXT)], 1, 2)
+
+
+def draw_text_strip(image, i):
+    PngDrawing.draw_text_strip(image, SAMPLE_TEXT[i % len(SAMPLE_TEXT)], 1, 2, 88)
+
+
+FRAME = bytearray(random.Random(0).getrandbits(1) * PIXEL_ON for _ in range(DISPLAY_WIDTH * DISPLAY_HEIGHT))
+TEXT_IMAGE = ImageSection(0, 0, 90, 12)
+
+CASES = [
+    Case("render browser page", lambda rig, i: rig.show_page("browser"), fresh=True),
+    Case("render session page", lambda rig, i: rig.show_page("session"), fresh=True),
+    Case("render mixer page", lambda rig, i: rig.show_page("mixer"), fresh=True),
+    Case("pad select", lambda rig, i: rig.select_pad(*PAD_SEQUENCE[i % len(PAD_SEQUENCE)]), show("session")),
+    Case("encoder scroll", scroll, show("browser")),
+    Case("volume encoder", lambda rig, i: rig.change_volume(5 if i % 2 else -5), show("session")),
+    Case("meter update", meters, show("session")),
+    Case("page switch", lambda rig, i: rig.show_page(PAGE_SEQUENCE[i % len(PAGE_SEQUENCE)]), show("browser")),
+    Case(
+        "encode frame",
+        lambda rig, i: encode_frame(FRAME, DISPLAY_WIDTH, DISPLAY_HEIGHT, use_numpy=False),
+        uses_rig=False,
+    ),
+    Case("draw_text", lambda rig, i: draw_text(TEXT_IMAGE, i), uses_rig=False),
+    Case(
+        "draw_text_strip (cold)",
+        lambda rig, i: draw_text_strip(TEXT_IMAGE, i),
+        setup=lambda rig: text_strip_cache.clear(),
+        fresh=True,
+        uses_rig=False,
+    ),
+    Case("draw_text_strip (cached)", lambda rig, i: draw_text_strip(TEXT_IMAGE, i), uses_rig=False),
+]
+
+
+def run_case(case, iterations):
+    """
+    :return: The median and 95th percentile time in milliseconds, with the messages and bytes
+        sent per iteration.
+    :rtype: dict
+    """
+    times = []
+    messages = 0
+    sent = 0
+    rig = None
+    for i in range(iterations):
+        if i == 0 or case.fresh:
+            rig = Rig() if case.uses_rig else None
+            if case.setup is not None:
+                case.setup(rig)
+        if rig is not None:
+            rig.emulator.reset_counters()
+        start = time.perf_counter()
+        case.action(rig, i)
+        times.append(time.perf_counter() - start)
+        if rig is not None:
+            messages += rig.emulator.messages
+            sent += rig.emulator.bytes
+    times.sort()
+    return {
+        "time_ms": statistics.median(times) * 1e3,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1e3,
+        "messages": messages / iterations,
+        "bytes": sent / iterations,
+    }
+
+
+def run(iterations=50, cases=CASES):
+    return {case.name: run_case(case, iterations) for case in cases}
+
+
+def compare(results, baseline, time_tolerance=0.25, byte_tolerance=0.0):
+    """
+    Checks results against a baseline. Messages and bytes may grow by byte_tolerance, the median
+    time by time_tolerance, both as fractions of the baseline.
+
+    :return: A description of every regression, empty if there is none.
+    :rtype: List[str]
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in ("messages", "bytes"):
+            if result[key] > reference[key] * (1 + byte_tolerance):
+                regressions.append(f"{name}: {key} {reference[key]:.1f} -> {result[key]:.1f}")
+        if result["time_ms"] > reference["time_ms"] * (1 + time_tolerance):
+            regressions.append(f"{name}: time {reference['time_ms']:.3f} ms -> {result['time_ms']:.3f} ms")
+    return regressions
+
+
+def report(results, baseline=None):
+    print(f"{'case':<28} {'median ms':>10} {'p95 ms':>10} {'msgs':>8} {'bytes':>10} {'vs baseline':>12}")
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline and baseline[name]["time_ms"]:
+            change = f"{result['time_ms'] / baseline[name]['time_ms'] - 1:+.0%}"
+        print(
+            f"{name:<28} {result['time_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+            f"{result['messages']:>8.1f} {result['bytes']:>10.1f} {change:>12}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--save", metavar="PATH", help="store the results as a baseline")
+    parser.add_argument("--check", metavar="PATH", help="fail if the results regress from this baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--byte-tolerance", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, [case for case in CASES if args.filter in case.name])
+    baseline = None
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.time_tolerance, args.byte_tolerance)
+        for regression in regressions:
+            print("regression:", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,17 @@
 import mido
 import os
-from mido import Message
+import asyncio
 from mpc_studio_display.display import Display, Page
 from mpc_studio_display.elements.text_element import TextElement
 from mpc_studio_display.transport_section import TransportSection
 from mpc_studio_display.session_section import SessionSection, TrackDetailsSection
 
 from mpc_studio_display.browser_page import create_browser_page
-from mpc_studio_display.util import message_length
+from mpc_studio_display.sysex import MSG_TYPE_MODE, MODE_PRIVATE, sysex_data
+from mpc_studio_display.midi_output import open_display_output
+from mpc_studio_display.output import OutputWriter
+from mpc_studio_display.runtime import ControllerRuntime
+from mpc_studio_display.recorder import SessionRecorder
 midi_port_name = "MPC Studio Black MPC Private"
 from mpc_studio_display.browser_api import BrowserItem, Browser
 
@@ -42,8 +46,10 @@ def choose_output(midi_port_name: str):
         portNumber = input("Select output index ")
         outPortIndex = int(portNumber)
     selected_port = outPorts[outPortIndex]
-    print(f"Opening output: {selected_port}")
-    return mido.open_output(selected_port)
+    # Display rows go straight to python-rtmidi when it is installed, through mido otherwise
+    out_port = open_display_output(selected_port)
+    print(f"Opening output: {selected_port} ({out_port.name})")
+    return out_port
 
 
 def choose_input(midi_port_name: str):
@@ -66,18 +72,6 @@ def choose_input(midi_port_name: str):
     return mido.open_input(selected_port)
 
 
-SYSEX_START_BYTE = 0xF0
-MANUFACTURE_ID = 0x47
-CATEGORY_ID = 0x7F
-PRODUCT_ID = 0x3D
-MSG_TYPE_MODE = 0x62
-MODE_PRIVATE = 0x61
-MODE_PUBLIC = 0x02
-MSG_TYPE_DISPLAY = 0x04
-MSG_TYPE_PING = 0x52
-SYSEX_END_BYTE = 0xF7
-SYSEX_HEADER = (MANUFACTURE_ID, CATEGORY_ID, PRODUCT_ID)
-SYSEX_END = (0xF7,)
 NUM_SCENE_CONTROLS = 6
 PADS_ARRANGEMENT = [
     [49, 55, 51, 53],
@@ -96,20 +90,13 @@ def send_sysex_message(msg_id, msg_payload):
     if not isinstance(msg_payload, tuple):
         msg_payload = (msg_payload,)
 
-    msg_length = message_length(msg_payload)
-    sysex_message = (
-        SYSEX_HEADER
-        + (msg_id,)
-        + msg_length
-        + msg_payload
-        # + SYSEX_END
-    )
+    sysex_message = sysex_data(msg_id, msg_payload)
     # logger.info("Sysex Message: %s", sysex_message)
-    msg = Message("sysex", data=sysex_message)
-    out_port.send(msg)
+    out_port.send_sysex(sysex_message)
 
 def send_payload(msg_payload):
-    send_sysex_message(MSG_TYPE_DISPLAY, msg_payload)
+    # The display assembles its messages with the sysex framing in place, see DisplayMessage
+    out_port.send_payload(msg_payload)
 
 
 send_sysex_message(MSG_TYPE_MODE, (MODE_PRIVATE,))
@@ -134,7 +121,17 @@ session_page.add_element(track_details_section)
 mixer_page = Page("mixer")
 mixer_page.add_element(text2)
 
-dis = Display(send_payload=send_payload)
+# Rows are queued and paced out by the runtime, so input handling never waits on a repaint
+writer = OutputWriter(send_payload)
+# Set MPC_RECORD to a file name to record the session for python -m benchmarks.replay
+record_path = os.environ.get("MPC_RECORD")
+recorder = SessionRecorder(open(record_path, "wb")) if record_path else None
+# Bytes per second the display updates may use on the USB-MIDI link, meters slow down beyond that
+DISPLAY_BYTE_BUDGET = 64000
+dis = Display(
+    send_payload=recorder.wrap_output(writer.submit) if recorder else writer.submit,
+    byte_budget=DISPLAY_BYTE_BUDGET,
+)
 dis.add_page("session", session_page)
 dis.add_page("mixer", mixer_page)
 dis.add_page("browser", browser_page)
@@ -178,19 +175,18 @@ def update_browser_sidebar_menu():
         lines_text.append(item_text)
     browser_page.BrowserSidebarMenu.set_lines_text(lines_text, selected_line_index=selected_line_index)
 
-def endless_encoder(midi_value):
-    direction = not midi_value >> 6
-    amount = midi_value & 0b0111111
-    if not direction:
-        amount = amount - 64
-    return amount
-
 volume = 64
 
-# Main loop
-# =================
-update_browser_sidebar_menu()
-for msg in in_port:
+def scroll_browser(amount):
+    browser.move_selection(amount)
+    update_browser_sidebar_menu()
+
+def change_volume(amount):
+    global volume
+    volume = max(0, min(127, volume + amount))
+    session_page.track_details_section.meter_element.set_volume_from_midi(volume)
+
+def handle_message(msg):
     # os.system('clear')
     # print(msg.bytes())
     bytes = msg.bytes()
@@ -208,22 +204,26 @@ for msg in in_port:
         coordinates = pad_map.get(bytes[1])
         if coordinates:
             track_index, clip_index = coordinates
-            for i, track in enumerate(session_page.session_section.tracks):
-                if i == track_index:
-                    track.state = 2
-                    track.select_clip(clip_index)
-                    session_page.track_details_section.track_name.text = track.track_name_element.text
-                else:
-                    track.state = 1
-    if midi_msg.msg_type == 0xB0:
-        if midi_msg.id == 16:
-            volume = max(0, min(127, volume + endless_encoder(midi_msg.value)))
-            session_page.track_details_section.meter_element.set_volume_from_midi(volume)
-
-        if midi_msg.id == 101 and midi_msg.value == 127:
-            browser.decrement_selection()
-            update_browser_sidebar_menu()
-
-        if midi_msg.id == 101 and midi_msg.value == 1:
-            browser.increment_selection()
-            update_browser_sidebar_menu()
+            with dis.batch():
+                for i, track in enumerate(session_page.session_section.tracks):
+                    if i == track_index:
+                        track.state = 2
+                        track.select_clip(clip_index)
+                        session_page.track_details_section.track_name.text = track.track_name_element.text
+                    else:
+                        track.state = 1
+
+# Main loop
+# =================
+update_browser_sidebar_menu()
+runtime = ControllerRuntime(dis, output=writer)
+runtime.add_handler(handle_message)
+# Encoder spins are summed per frame and handled as one movement
+runtime.add_encoder(16, change_volume)
+runtime.add_encoder(101, scroll_browser)
+runtime.attach_input(in_port, recorder.wrap_input(runtime.feed) if recorder else None)
+try:
+    asyncio.run(runtime.run())
+finally:
+    if recorder:
+        recorder.close()
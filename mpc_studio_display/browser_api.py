@@ -157,6 +157,11 @@ class Browser:
         if self.selected_index > 0:
             self.selected_index -= 1
 
+    def move_selection(self, amount):
+        # Move the selection by a relative amount, stopping at the first and last item.
+        if self.root.children:
+            self.selected_index = clamp(self.selected_index + amount, 0, len(self.root.children) - 1)
+
     def __index_in_bounds(self, index):
         # Check if the index is within the bounds of the children list.
         return 0 <= index < len(self.root.children)
@@ -1,18 +1,48 @@
-from .util import clamp, message_length, msblsb
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from .util import clamp
 from .graphics import PngDrawing, ImageSection, Icons_5x5
+from .encoding import PIXELS_PER_BYTE, SYSEX_FRAMING_SIZE, changed_spans, encode_line
+from .stats import RenderStats
+from .output import ByteBudget
+from .sysex import DisplayMessage
 DISPLAY_WIDTH = 360
 DISPLAY_HEIGHT = 96
+# Priorities of the rows an element changes. Interactive rows are sent first and always, ambient
+# rows such as meters only while the byte budget allows.
+PRIORITY_AMBIENT = 0
+PRIORITY_INTERACTIVE = 1
 class Display:
 
-    def __init__(self, send_payload ) -> None:
+    def __init__(self, send_payload, frame_rate=30, byte_budget=None) -> None:
         self.send_payload = send_payload
+        # Bytes per second the link to the device sustains, None sends everything at once
+        self.budget = ByteBudget(byte_budget) if byte_budget else None
+        # Ambient rows held back because the budget ran out, sent on a later present
+        self._deferred = set()
         self.pages = {}
         self._current_page = None
+        # Flushes per second, the pace at which ControllerRuntime ticks the display
+        self.frame_rate = frame_rate
+        # Elements waiting to be rendered, in the order they were invalidated
+        self._invalid = {}
+        self._batch_depth = 0
+        # Visible elements of each page in render order, see __render_plan
+        self._plans = {}
+        # Back buffer the active page is composited into
+        self.frame = ImageSection(0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        # Encoded rows as the device currently shows them, None when unknown
+        self._shadow = [None] * DISPLAY_HEIGHT
+        # Reused for every update of a row, see DisplayMessage
+        self._messages = [DisplayMessage(DISPLAY_WIDTH // PIXELS_PER_BYTE) for _ in range(DISPLAY_HEIGHT)]
+        # RenderStats while instrumentation is enabled, see enable_stats
+        self._stats = None
 
     def initialize(self):
         for page_name in self.pages:
             page = self.pages[page_name]
-            page.initialize(self.send_payload)
+            page.initialize(self)
 
     def add_page(self, name, page):
         self.pages[name] = page
@@ -26,19 +56,252 @@ class Display:
                 if self._current_page == name:
                     return
                 else:
-                    page.activate()
-                    page.render()
                     self._current_page = name
+                    page.activate()
+
+    def schedule(self, element):
+        """
+        Queues an element to be rendered by the next flush.
+        """
+        self._invalid[element] = None
+
+    def flush(self):
+        """
+        Renders every element invalidated since the last flush and presents the result once.
+        Inside a batch the flush is deferred until the batch ends.
+
+        The active page is walked once, top-down, and each element renders at most once per flush.
+        An element invalidated by the render of one drawn before it, like a child whose state its
+        parent sets, is reached later in the same pass. One invalidated after it already rendered
+        waits for the next flush.
+        """
+        if self._batch_depth:
+            return
+        rendered = set()
+        try:
+            page = self.pages.get(self._current_page)
+            if page is not None:
+                for element in self.__render_plan(page):
+                    if element in self._invalid:
+                        del self._invalid[element]
+                        self.__render_element(element, rendered)
+            # Whatever is left is not part of the active page, or was invalidated behind the pass
+            for element in list(self._invalid):
+                if element not in rendered:
+                    del self._invalid[element]
+                    self.__render_element(element, rendered)
+        finally:
+            self.present()
+
+    def __render_element(self, element, rendered):
+        if element.active and not element.culled:
+            if self._stats is None:
+                element.render()
+            else:
+                self._stats.render(element)
+            rendered.add(element)
+
+    @contextmanager
+    def batch(self):
+        """
+        Defers all rendering inside the block and flushes once when the outermost batch ends.
+        Batches can be nested and span any number of elements and pages.
+
+            with display.batch():
+                track_details.mute = True
+                track_details.solo = True
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+
+    def present(self):
+        """
+        Composites the active page into the back buffer and sends the rows that differ from what the device shows.
+        Interactive rows go out first. Once the byte budget is spent, ambient rows are held back for a later
+        present, so they refresh less often instead of delaying what the user interacts with.
+        """
+        page = self.pages.get(self._current_page)
+        if page is None:
+            return
+        stats = self._stats
+        if stats is not None:
+            start = time.perf_counter()
+        rows = self.__compose(page)
+        if stats is not None:
+            stats.composed(time.perf_counter() - start)
+        for y in self._deferred:
+            rows.setdefault(y, PRIORITY_AMBIENT)
+        self._deferred.clear()
+        budget = self.budget
+        for y in sorted(rows, key=lambda y: (-rows[y], y)):
+            if budget is not None and rows[y] < PRIORITY_INTERACTIVE and budget.available() <= 0:
+                self._deferred.add(y)
+                continue
+            sent = self.__send_row(y) if stats is None else self.__send_row_timed(y, stats)
+            if budget is not None and sent:
+                budget.consume(sent)
+
+    def enable_stats(self, enabled=True):
+        """
+        Turns render instrumentation on or off. Turning it on starts from zeroed counters.
+        """
+        self._stats = RenderStats() if enabled else None
+
+    def stats(self):
+        """
+        Returns a snapshot of the render instrumentation, see RenderStats.snapshot, or None when it is off.
+        """
+        if self._stats is None:
+            return None
+        return self._stats.snapshot(self.pages.values())
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def layout_changed(self):
+        """
+        Drops the cached render plans, called when elements are added to a page.
+        """
+        self._plans.clear()
+
+    def __render_plan(self, page):
+        """
+        Returns the elements of a page that can be seen, in render order. Elements outside the display
+        or entirely covered by a single element drawn after them are culled, they are neither rendered
+        nor composited.
+        """
+        plan = self._plans.get(page)
+        if plan is None:
+            elements = list(page.walk())
+            plan = []
+            for i, element in enumerate(elements):
+                x0, y0, x1, y1 = element.display_rect
+                element.culled = x0 >= x1 or y0 >= y1 or any(
+                    other_x0 <= x0 and other_y0 <= y0 and other_x1 >= x1 and other_y1 >= y1
+                    for other_x0, other_y0, other_x1, other_y1 in (
+                        other.display_rect for other in elements[i + 1:]
+                    )
+                )
+                if not element.culled:
+                    plan.append(element)
+            self._plans[page] = plan
+        return plan
+
+    def __compose(self, page):
+        """
+        Redraws the back buffer rows touched since the last present, layering every element of the page
+        in render order. Returns the priority of each redrawn display row, the highest of the elements
+        that changed it.
+        """
+        elements = self.__render_plan(page)
+        priorities = {}
+        for element in elements:
+            if element.dirty_rows:
+                y_pos = element.y_pos
+                element_rows = [y_pos + y for y in element.dirty_rows if 0 <= y_pos + y < DISPLAY_HEIGHT]
+                element.dirty_rows.clear()
+                priority = element.priority if element.update_priority is None else element.update_priority
+                element.update_priority = None
+                for y in element_rows:
+                    if priorities.get(y, -1) < priority:
+                        priorities[y] = priority
+                if self._stats is not None:
+                    self._stats.rows_changed(element, element_rows)
+        if not priorities:
+            return priorities
+        rows = sorted(priorities)
+
+        target = self.frame.buffer
+        for element in elements:
+            x0, y0, x1, y1 = element.display_rect
+            source = memoryview(element.buffer)
+            source_offset = x0 - element.x_pos
+            length = x1 - x0
+            first = bisect_left(rows, y0)
+            for y in rows[first:]:
+                if y >= y1:
+                    break
+                start = (y - element.y_pos) * element.width + source_offset
+                target[y * DISPLAY_WIDTH + x0:y * DISPLAY_WIDTH + x1] = source[start:start + length]
+        return priorities
+
+    def __send_row(self, y):
+        """
+        Sends the changed spans of a row, returns the bytes they take on the wire.
+        """
+        line = encode_line(self.frame.row(y))
+        previous = self._shadow[y]
+        if line == previous:
+            return 0
+        _, sent = self.__send_spans(y, previous, line)
+        self._shadow[y] = line
+        return sent
+
+    def __send_row_timed(self, y, stats):
+        start = time.perf_counter()
+        line = encode_line(self.frame.row(y))
+        previous = self._shadow[y]
+        encoded = time.perf_counter()
+        if line == previous:
+            stats.row_done(y, encoded - start)
+            return 0
+        messages, sent = self.__send_spans(y, previous, line)
+        self._shadow[y] = line
+        stats.row_done(y, encoded - start, time.perf_counter() - encoded, messages, sent)
+        return sent
+
+    def __send_spans(self, y, previous, line):
+        """
+        Sends the spans of a row that differ from what the device shows, each assembled in the row's
+        DisplayMessage. Returns the number of messages and the bytes they take on the wire.
+        """
+        message = self._messages[y]
+        line_view = memoryview(line)
+        messages = 0
+        sent = 0
+        for start, end in changed_spans(previous, line):
+            first_pixel = start * PIXELS_PER_BYTE
+            # The last span keeps the row's full pixel count, like a whole row does
+            if end == len(line):
+                span_width = DISPLAY_WIDTH - first_pixel
+            else:
+                span_width = (end - start) * PIXELS_PER_BYTE
+            self.send_payload(message.write(span_width, first_pixel, y, line_view[start:end]))
+            messages += 1
+            sent += message.length + SYSEX_FRAMING_SIZE
+        return messages, sent
 
 
 class Element(ImageSection):
+    # Priority of the rows this element changes, PRIORITY_AMBIENT for elements that update on their own
+    priority = PRIORITY_INTERACTIVE
+
     def __init__(self, name, x, y, width, height) -> None:
         super().__init__(0, 0, width, height)
         self.x_pos = x
         self.y_pos = y
         self.name = name
-        self.send_payload = None
+        self.display = None
         self.active = False
+        # Set by the display when nothing of this element can be seen
+        self.culled = False
+        # Priority of the pending update if it differs from priority, see invalidate
+        self.update_priority = None
+        # Only the part of the element that ends up on the panel is drawn. Elements are sent in whole
+        # pixel groups, trailing pixels that do not fill a group never reach the device.
+        self.push_clip(-x, -y, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        self.push_clip(0, 0, width - width % PIXELS_PER_BYTE, height)
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        # Area of the display this element covers, as (x0, y0, x1, y1)
+        self.display_rect = (x + clip_x0, y + clip_y0, x + clip_x1, y + clip_y1)
+        # Child elements by name, in the order they were added. This is also the render order.
+        self.elements = {}
 
     def set_activte(self, value):
         if value:
@@ -48,60 +311,78 @@ class Element(ImageSection):
 
     def activate(self):
         self.active = True
-        for attr in dir(self):
-            el = getattr(self, attr)
-            if isinstance(el, Element):
-                el.activate()
+        self.mark_dirty()
+        self.invalidate()
+        for el in self.elements.values():
+            el.activate()
 
     def deactivate(self):
         self.active = False
-        for attr in dir(self):
-            el = getattr(self, attr)
-            if isinstance(el, Element):
-                el.deactivate()
-
-    def __encode_line(self, line):
-        arr = []
-        bit = 0x00
-        bitmap = [0x30, 0x0C, 0x03]
-        for i, pixel in enumerate(line):
-            stride = i % 3
-            if pixel[0] > 0:
-                bit = bit | bitmap[stride]
-            else:
-                bit = bit | 0x00
-            if stride == 2 and i > 0:
-                arr.append(bit)
-                bit = 0x00
-        return arr
+        for el in self.elements.values():
+            el.deactivate()
 
     def add_element(self, element, name=None):
+        """
+        Adds a child element, reachable as an attribute under its name. Adding another element
+        under an existing name replaces it in place. An element added after the display was
+        initialized is initialized too, and activated if this element is active.
+        """
         name = name if name else element.name
         setattr(self, name, element)
+        self.elements[name] = element
+        if self.display is not None:
+            element.initialize(self.display)
+            self.display.layout_changed()
+            if self.active:
+                element.activate()
         return element
 
+    def invalidate(self, priority=None):
+        """
+        Schedules this element to be rendered on the next flush of its display.
+
+        :param priority: Overrides the element's priority for this update, the highest one given
+            before the update is sent applies.
+        :type priority
+        """
+        if priority is not None and (self.update_priority is None or priority > self.update_priority):
+            self.update_priority = priority
+        if self.display is not None:
+            self.display.schedule(self)
+
+    def batch(self):
+        """
+        Defers rendering until the end of the block, see Display.batch.
+        """
+        if self.display is None:
+            return nullcontext(self)
+        return self.display.batch()
+
+    def mark_dirty(self):
+        """
+        Marks every row of this element as changed, so the next present recomposites it.
+        """
+        self.dirty_rows.update(range(self.height))
+
+    def walk(self):
+        """
+        Yields this element and all of its descendants in render order, parents before their children.
+        """
+        yield self
+        for el in self.elements.values():
+            yield from el.walk()
+
     def render(self):
-        if self.active:
-            for y, row in enumerate(self.data):
-                pixels = msblsb(len(row))
-                xpos = msblsb(self.x_pos)
-                ypos = msblsb(self.y_pos + y)
-                pixel_data = self.__encode_line(row)
-                payload = pixels + xpos + ypos + tuple(pixel_data)
-                self.send_payload(payload)
-
-            # render all elements that belong to this element
-            for attr in dir(self):
-                el = getattr(self, attr)
-                if isinstance(el, Element):
-                    el.render()
-
-    def initialize(self, send_payload):
-        setattr(self, 'send_payload', send_payload) 
-        for attr in dir(self):
-            el = getattr(self, attr)
-            if isinstance(el, Element):
-                el.initialize(send_payload)
+        """
+        Draws this element into its buffer, does nothing by default. Children are not drawn from
+        here, the display renders every invalidated element once per flush, see Display.flush.
+        Invalidate an element to have it redrawn.
+        """
+
+    def initialize(self, display):
+        setattr(self, 'display', display)
+        for el in self.elements.values():
+            el.initialize(display)
 
 class Page(Element):
     def __init__(self, name):
@@ -41,7 +41,7 @@ class ClipSlotElement(Element):
     @selected.setter
     def selected(self, value):
         self._selected = value
-        self.render()
+        self.invalidate()
     
     @property
     def state(self):
@@ -50,7 +50,7 @@ class ClipSlotElement(Element):
     @state.setter
     def state(self, value):
         self._state = value
-        self.render()
+        self.invalidate()
 
     @property
     def text(self):
@@ -59,7 +59,7 @@ class ClipSlotElement(Element):
     @text.setter
     def text(self, value):
         self._text = value
-        self.render()
+        self.invalidate()
 
     def render_selected(self, empty=False):
         if empty:
@@ -1,12 +1,23 @@
-from ..display import Element
+from ..display import Element, PRIORITY_AMBIENT, PRIORITY_INTERACTIVE
 from ..graphics import PngDrawing, Icons_5x5
+from ..util import clamp
+
+COLOR = (255, 255, 255)
+BACKGROUND_COLOR = (0, 0, 0)
+# Width and height of the volume icon
+ICON_SIZE = 5
 
 class MeterElement(Element):
+    # Meters move on their own, only volume changes are interactive
+    priority = PRIORITY_AMBIENT
+
     def __init__(self, x, y, width, height) -> None:
         super().__init__("meter_element", x, y, width, height)
         self._left_meter = .5
         self._right_meter = .5
         self._volume = .5
+        # (left fill height, right fill height, volume icon y) as currently drawn, None before the first render
+        self._drawn = None
 
     @property
     def left_meter(self):
@@ -15,7 +26,7 @@ class MeterElement(Element):
     @left_meter.setter
     def left_meter(self, value):
         self._left_meter = value
-        self.render()
+        self.invalidate()
 
     @property
     def right_meter(self):
@@ -24,7 +35,7 @@ class MeterElement(Element):
     @right_meter.setter
     def right_meter(self, value):
         self._right_meter = value
-        self.render()
+        self.invalidate()
 
     @property
     def volume(self):
@@ -33,36 +44,45 @@ class MeterElement(Element):
     @volume.setter
     def volume(self, value):
         self._volume = value
-        self.render()
+        self.invalidate(PRIORITY_INTERACTIVE)
 
     def set_meters(self, left, right):
         self._left_meter = left
         self._right_meter = right
-        self.render()
+        self.invalidate()
 
     def set_meters_from_midi(self, left, right):
         self._left_meter = left / 127
         self._right_meter = right / 127
-        self.render()
+        self.invalidate()
 
     def set_volume_from_midi(self, value):
         self._volume = value / 127
-        self.render()
+        self.invalidate(PRIORITY_INTERACTIVE)
 
     def set_all_from_midi(self, left, right, volume):
-        self._left_meter = left / 127
-        self._right_meter = right / 127
-        self._volume = volume / 127
-        self.render()
+        self.set_all(left / 127, right / 127, volume / 127)
 
     def set_all(self, left, right, volume):
         self._left_meter = left
         self._right_meter = right
+        volume_changed = volume != self._volume
         self._volume = volume
-        self.render()
+        self.invalidate(PRIORITY_INTERACTIVE if volume_changed else None)
+
+    @property
+    def meter_width(self):
+        return (self.width // 3) - 1
+
+    def __fill_height(self, value):
+        # Same rounding as PngDrawing.draw_vertical_meter
+        return int(self.height * clamp(float(value), 0, 1))
+
+    def __volume_y(self):
+        return self.height - int(self._volume * self.height) - 2
 
     def __draw_meters(self):
-        meter_width = (self.width // 3) - 1
+        meter_width = self.meter_width
         meter_height = self.height
         meter_x = meter_width
         meter_y = 0
@@ -81,13 +101,46 @@ class MeterElement(Element):
             meter_height,
         )
 
-    def __draw_volume(self):
-        volume_height = self.height
-        volume_y = volume_height - int(self._volume * volume_height) - 2
-        PngDrawing.draw_icon(self, Icons_5x5.play, 0, volume_y, color=(255, 255, 255))
+    def __draw_fill_change(self, meter_x, old_height, new_height):
+        """
+        Redraws the rows of a meter between its old and new fill height, leaving the rest untouched.
+        """
+        meter_width = self.meter_width
+        old_y = self.height - old_height
+        new_y = self.height - new_height
+        if new_y < old_y:
+            self.fill_rect(meter_x, new_y, meter_width, old_y - new_y, COLOR)
+        else:
+            rows = new_y - old_y
+            self.fill_rect(meter_x, old_y, meter_width, rows, BACKGROUND_COLOR)
+            # Put back the outline the fill covered
+            self.fill_rect(meter_x, old_y, 1, rows, COLOR)
+            self.fill_rect(meter_x + meter_width, old_y, 1, rows, COLOR)
+            if old_y == 0:
+                self.fill_rect(meter_x, 0, meter_width + 1, 1, COLOR)
+
+    def __draw_volume(self, volume_y):
+        PngDrawing.draw_icon(self, Icons_5x5.play, 0, volume_y, color=COLOR)
 
     def render(self):
-        self.clear()
-        self.__draw_meters()
-        self.__draw_volume()
+        heights = (self.__fill_height(self._left_meter), self.__fill_height(self._right_meter))
+        volume_y = self.__volume_y()
+        # The incremental path leaves the icon alone, it only holds while no meter reaches into its
+        # columns, as on meters narrower than 18 pixels
+        if self._drawn is None or self.meter_width < ICON_SIZE:
+            self.clear()
+            self.__draw_meters()
+            self.__draw_volume(volume_y)
+        else:
+            # Only the rows between the drawn and the new levels change
+            left_height, right_height, drawn_volume_y = self._drawn
+            meter_x = self.meter_width
+            if heights[0] != left_height:
+                self.__draw_fill_change(meter_x, left_height, heights[0])
+            if heights[1] != right_height:
+                self.__draw_fill_change(meter_x + self.meter_width, right_height, heights[1])
+            if volume_y != drawn_volume_y:
+                self.fill_rect(0, drawn_volume_y, ICON_SIZE, ICON_SIZE, BACKGROUND_COLOR)
+                self.__draw_volume(volume_y)
+        self._drawn = heights + (volume_y,)
         super().render()
@@ -14,7 +14,7 @@ class MetronomeElement(Element):
     @enabled.setter
     def enabled(self, value):
         self._enabled = value
-        self.render()
+        self.invalidate()
 
     def render(self):
         if self._enabled:
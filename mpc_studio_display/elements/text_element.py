@@ -16,7 +16,7 @@ class TextElement(Element):
     @enabled.setter
     def enabled(self, value):
         self._enabled = value
-        self.render()
+        self.invalidate()
 
     @property
     def selected(self):
@@ -25,7 +25,7 @@ class TextElement(Element):
     @selected.setter
     def selected(self, value):
         self._selected = value
-        self.render()
+        self.invalidate()
 
     @property
     def text(self):
@@ -34,21 +34,21 @@ class TextElement(Element):
     @text.setter
     def text(self, value):
         self._text = value
-        self.render()
+        self.invalidate()
 
     def render_selected(self):
         if self._enabled:
             font_height = 7 * self.scale
             center_start_y = self.y + ((self.height - font_height) // 2)
             PngDrawing.draw_rectangle(self, self.x, self.y, self.width, self.height, (255,255,255))
-            PngDrawing.draw_text(self, self._text, self.x+1, center_start_y, scale=self.scale, color=(0,0,0))
+            PngDrawing.draw_text_strip(self, self._text, self.x+1, center_start_y, self.width - 1, scale=self.scale, color=(0,0,0), background_color=(255,255,255))
 
     def render_unselected(self):
         if self._enabled:
             font_height = 7 * self.scale
             center_start_y = self.y + ((self.height - font_height) // 2)
             PngDrawing.draw_rectangle(self, self.x, self.y, self.width, self.height, (0,0,0))
-            PngDrawing.draw_text(self, self._text, self.x+1, center_start_y, scale=self.scale, color=(255,255,255))
+            PngDrawing.draw_text_strip(self, self._text, self.x+1, center_start_y, self.width - 1, scale=self.scale, color=(255,255,255), background_color=(0,0,0))
 
     def render(self):
         if self._selected:
@@ -0,0 +1,109 @@
+from .graphics import PngImage
+from .encoding import DECODE_TABLE, PAYLOAD_HEADER_SIZE, SYSEX_FRAMING_SIZE
+from .display import DISPLAY_WIDTH, DISPLAY_HEIGHT
+
+# Grey value of each 2-bit pixel level in PNG snapshots
+LEVEL_COLORS = tuple((level * 85,) * 3 for level in range(4))
+
+
+class DisplayEmulator:
+    """
+    Headless stand-in for the MPC Studio display. Pass an instance as the send_payload of a Display
+    and every payload is decoded into a virtual framebuffer, the way the device would show it.
+    Messages and bytes are counted as they would go over the wire, which makes the emulator a target
+    for benchmarks and regression checks that need no hardware.
+
+        emulator = DisplayEmulator()
+        display = Display(send_payload=emulator)
+        ...
+        emulator.save_png("frame.png")
+    """
+
+    def __init__(self, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT) -> None:
+        self.width = width
+        self.height = height
+        # Pixel levels 0-3, one byte per pixel, row after row
+        self.buffer = bytearray(width * height)
+        self.reset_counters()
+
+    def __call__(self, payload):
+        self.send_payload(payload)
+
+    def send_payload(self, payload):
+        """
+        Decodes a display payload into the framebuffer. Pixels outside the display are dropped.
+
+        :param payload: Pixel count, x and y as msb/lsb pairs followed by the pixel bytes.
+        :type payload
+        """
+        payload = bytes(payload)
+        self.messages += 1
+        self.payload_bytes += len(payload)
+        self.bytes += len(payload) + SYSEX_FRAMING_SIZE
+
+        width = (payload[0] << 7) | payload[1]
+        x = (payload[2] << 7) | payload[3]
+        y = (payload[4] << 7) | payload[5]
+        if y >= self.height or x >= self.width:
+            return
+        pixels = b"".join(DECODE_TABLE[value] for value in payload[PAYLOAD_HEADER_SIZE:])
+        count = min(width, len(pixels), self.width - x)
+        start = y * self.width + x
+        self.buffer[start:start + count] = pixels[:count]
+
+    def reset_counters(self):
+        self.messages = 0
+        self.payload_bytes = 0
+        self.bytes = 0
+
+    def reset(self):
+        """
+        Blanks the framebuffer and resets the counters.
+        """
+        self.buffer[:] = bytes(len(self.buffer))
+        self.reset_counters()
+
+    def stats(self):
+        """
+        :return: The number of messages, payload bytes and wire bytes received so far.
+        :rtype: dict
+        """
+        return {"messages": self.messages, "payload_bytes": self.payload_bytes, "bytes": self.bytes}
+
+    def get_pixel(self, x, y):
+        return self.buffer[y * self.width + x]
+
+    def row(self, y):
+        return memoryview(self.buffer)[y * self.width:(y + 1) * self.width]
+
+    def snapshot(self):
+        """
+        :return: A copy of the framebuffer, for comparing frames.
+        :rtype: bytes
+        """
+        return bytes(self.buffer)
+
+    def to_png(self, scale=1):
+        """
+        Draws the framebuffer into a PngImage, lit pixels in shades of grey on black.
+
+        :param scale: The size of each display pixel in the image.
+        :type scale
+        :rtype: PngImage
+        """
+        image = PngImage(self.width * scale, self.height * scale)
+        for y in range(self.height):
+            row = self.row(y)
+            x = 0
+            while x < self.width:
+                level = row[x]
+                end = x + 1
+                while end < self.width and row[end] == level:
+                    end += 1
+                if level:
+                    image.fill_rect(x * scale, y * scale, (end - x) * scale, scale, LEVEL_COLORS[level])
+                x = end
+        return image
+
+    def save_png(self, filename, scale=1):
+        self.to_png(scale).save_png(filename)
@@ -0,0 +1,130 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PIXELS_PER_BYTE = 3
+# Bits of a wire byte used by the first, second and third pixel of a group
+PIXEL_MASKS = (0x30, 0x0C, 0x03)
+PIXEL_SHIFTS = (4, 2, 0)
+# Highest 2-bit intensity level
+MAX_LEVEL = 0x03
+# Levels of the three pixels held by each wire byte
+DECODE_TABLE = tuple(
+    bytes(((value >> 4) & 0x03, (value >> 2) & 0x03, value & 0x03))
+    for value in range(256)
+)
+# bytes.translate tables mapping a stored pixel level to its bits within a group
+GROUP_TABLES = tuple(
+    bytes(min(value, MAX_LEVEL) << shift for value in range(256)) for shift in PIXEL_SHIFTS
+)
+
+# Bytes of a payload before its pixel data: pixel count, x and y as msb/lsb pairs
+PAYLOAD_HEADER_SIZE = 6
+# Bytes wrapped around each payload on the wire: sysex start, header, message id,
+# message length and sysex end
+SYSEX_FRAMING_SIZE = 8
+# Bytes every row message costs besides its pixel data
+MESSAGE_OVERHEAD = PAYLOAD_HEADER_SIZE + SYSEX_FRAMING_SIZE
+
+
+def changed_spans(previous, current, merge_gap=MESSAGE_OVERHEAD):
+    """
+    Finds the byte ranges of an encoded row that differ from what was sent before.
+
+    Each byte of an encoded row holds PIXELS_PER_BYTE pixels, so the spans are
+    aligned to the pixel groups of the wire format. Spans separated by no more
+    than merge_gap unchanged bytes are merged, since resending those bytes is
+    cheaper than starting another message.
+
+    :param previous: The encoded row as last sent, or None if unknown.
+    :type previous
+    :param current: The encoded row as it should be shown.
+    :type current
+    :param merge_gap: The largest run of unchanged bytes to send within a span.
+    :type merge_gap
+    :return: A list of (start, end) byte ranges, end exclusive.
+    :rtype: List[Tuple[int, int]]
+    """
+    if previous is None or len(previous) != len(current):
+        return [(0, len(current))] if len(current) else []
+    if previous == current:
+        return []
+
+    spans = []
+    start = None
+    end = 0
+    for i, (old, new) in enumerate(zip(previous, current)):
+        if old == new:
+            continue
+        if start is None:
+            start = i
+        elif i - end > merge_gap:
+            spans.append((start, end))
+            start = i
+        end = i + 1
+    spans.append((start, end))
+    return spans
+
+
+def encode_line(line):
+    """
+    Encodes a row of pixel levels into wire bytes, three pixels per byte.
+
+    Pixels are stored as their 2-bit wire levels, so encoding only packs them:
+    every third pixel is gathered with a strided slice and shifted into place
+    with bytes.translate. The three results never share bits, so they are
+    combined with a single OR over the whole row as integers. Trailing pixels
+    that do not fill a group are dropped.
+
+    :param line: The row of pixel levels, one byte per pixel.
+    :type line: bytes, bytearray or memoryview
+    :return: The encoded row.
+    :rtype: bytes
+    """
+    count = len(line) // PIXELS_PER_BYTE
+    if not count:
+        return b""
+    line = bytes(line)
+    end = count * PIXELS_PER_BYTE
+    first, second, third = GROUP_TABLES
+    bits = (
+        int.from_bytes(line[0:end:3].translate(first), "big")
+        | int.from_bytes(line[1:end:3].translate(second), "big")
+        | int.from_bytes(line[2:end:3].translate(third), "big")
+    )
+    return bits.to_bytes(count, "big")
+
+
+def encode_frame(buffer, width, height, use_numpy=None):
+    """
+    Encodes a whole framebuffer, one encoded row per framebuffer row.
+
+    Uses NumPy when it is installed, unless use_numpy is False. Without it,
+    frames whose width is a multiple of PIXELS_PER_BYTE are still encoded in
+    one pass over the buffer.
+
+    :param buffer: The pixel levels, one byte per pixel, row major.
+    :type buffer
+    :param width: The width of the frame in pixels.
+    :type width
+    :param height: The height of the frame in pixels.
+    :type height
+    :param use_numpy: Force the NumPy path on or off. Defaults to using it when available.
+    :type use_numpy
+    :return: The encoded rows.
+    :rtype: List[bytes]
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    count = width // PIXELS_PER_BYTE
+    if use_numpy:
+        pixels = numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(height, width)
+        groups = numpy.minimum(pixels[:, :count * PIXELS_PER_BYTE], MAX_LEVEL).reshape(height, count, PIXELS_PER_BYTE)
+        encoded = (groups << numpy.array(PIXEL_SHIFTS, dtype=numpy.uint8)).sum(axis=2, dtype=numpy.uint8)
+        return [row.tobytes() for row in encoded]
+    if width % PIXELS_PER_BYTE:
+        view = memoryview(buffer)
+        return [encode_line(view[y * width:(y + 1) * width]) for y in range(height)]
+    encoded = encode_line(buffer)
+    return [encoded[y * count:(y + 1) * count] for y in range(height)]
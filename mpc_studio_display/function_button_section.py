@@ -18,7 +18,6 @@ class FunctionButtonSection(Element):
             button_width = 51
             button_height = height - 2
             button_element = TextElement(button_name, button_text, button_x, button_y, button_width, button_height)
-            setattr(self, button_name, button_element)
             self.add_element(button_element, button_name)
 
 
@@ -2,6 +2,8 @@ from typing import Tuple, List, BinaryIO
 import zlib, math
 import struct
 from io import BytesIO
+from functools import lru_cache
+from collections import OrderedDict
 sin = math.sin 
 cos = math.cos
 rad = math.radians
@@ -82,6 +84,9 @@ font_5x7 = {
     "/": [0b00001, 0b00010, 0b01000, 0b00100, 0b01000, 0b01000, 0b10000],
 }
 
+# Glyphs with descenders use an eighth row
+FONT_MAX_ROWS = max(len(bitmap) for bitmap in font_5x7.values())
+
 
 class Icons_5x5:
     drums = [0b11011, 0b11011, 0b00000, 0b11011, 0b11011]
@@ -243,17 +248,120 @@ class ColorSpectrum:
         # Convert back to RGB
         return cls.hsv_to_rgb(h, s, v)
 
+# Pixels are stored as the 2-bit intensity levels of the wire format, 0 to PIXEL_ON
+PIXEL_OFF = 0
+PIXEL_ON = 3
+
+
+@lru_cache(maxsize=256)
+def pixel_value(color):
+    """
+    Quantizes an RGB color into the intensity level stored in an ImageSection framebuffer.
+    The display is greyscale, the brightest channel of the color sets the level. Drawing
+    methods quantize their color once per call, the encoder then uses the levels as they are.
+
+    :param color: The color of the pixel, or a level which is returned unchanged.
+    :type color: Tuple[int, int, int] or int
+    :return: A level from PIXEL_OFF to PIXEL_ON.
+    :rtype: int
+    """
+    if isinstance(color, int):
+        return max(PIXEL_OFF, min(color, PIXEL_ON))
+    return (max(color[:3]) * PIXEL_ON + 127) // 255
+
+
+@lru_cache(maxsize=512)
+def fill_bytes(value, length):
+    """
+    Returns length bytes of the given pixel value, cached for repeated span and clear writes.
+    """
+    return bytes((value,)) * length
+
+
 class ImageSection:
     def __init__(self,x, y, width, height):
         self.x = x
         self.y = y
         self.width  = width
         self.height  = height
-        self.data = [[(0, 0, 0) for _ in range(width)] for _ in range(height)]
+        # One byte per pixel, row major. See pixel_value.
+        self.buffer = bytearray(width * height)
+        # Rows touched since the owner last flushed them
+        self.dirty_rows = set()
+        # Drawing is limited to this (x0, y0, x1, y1) rectangle, see push_clip
+        self.clip = (0, 0, width, height)
+        self._clip_stack = []
+
+    @property
+    def data(self):
+        """
+        Rows of the framebuffer as writable memoryviews, so data[y][x] reads and writes a single pixel value.
+
+        :return: A list of rows, one memoryview per row.
+        :rtype: List[memoryview]
+        """
+        width = self.width
+        view = memoryview(self.buffer)
+        return [view[y * width:(y + 1) * width] for y in range(self.height)]
+
+    def row(self, y):
+        """
+        Returns a single row of the framebuffer as a memoryview.
+
+        :param y: The y-coordinate of the row.
+        :type y
+        :return: The pixel values of the row.
+        :rtype: memoryview
+        """
+        start = y * self.width
+        return memoryview(self.buffer)[start:start + self.width]
+
+    def push_clip(self, x, y, width, height):
+        """
+        Restricts all drawing to the intersection of the current clip rectangle and the given one,
+        until the matching pop_clip.
+
+        :param x: The x-coordinate of the top-left corner of the clip rectangle.
+        :type x
+        :param y: The y-coordinate of the top-left corner of the clip rectangle.
+        :type y
+        :param width: The width of the clip rectangle.
+        :type width
+        :param height: The height of the clip rectangle.
+        :type height
+        :return: None
+        :rtype: None
+        """
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        self._clip_stack.append(self.clip)
+        x0 = max(x, clip_x0)
+        y0 = max(y, clip_y0)
+        self.clip = (x0, y0, max(x0, min(x + width, clip_x1)), max(y0, min(y + height, clip_y1)))
+
+    def pop_clip(self):
+        """
+        Restores the clip rectangle that was active before the last push_clip.
+        """
+        self.clip = self._clip_stack.pop()
+
+    def visible(self, x, y, width, height):
+        """
+        Returns True if any part of the given rectangle lies within the clip rectangle.
+        """
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        return x < clip_x1 and y < clip_y1 and x + width > clip_x0 and y + height > clip_y0
+
+    def get_pixel(self, x, y):
+        """
+        Returns the stored value of the pixel at the specified coordinates, or PIXEL_OFF outside the image boundaries.
+        """
+        if x >= 0 and x < self.width and y >= 0 and y < self.height:
+            return self.buffer[y * self.width + x]
+        return PIXEL_OFF
 
     def draw_pixel(self, x, y, color):
         """
-        Draws a pixel at the specified coordinates with the given color. Will not draw outside the image boundaries.
+        Draws a pixel at the specified coordinates with the given color. Will not draw outside the clip rectangle.
 
         :param x: The x-coordinate of the pixel.
         :type x
@@ -264,13 +372,107 @@ class ImageSection:
         :return: None
         :rtype: None
         """
-        if x >= 0 and x < self.width and y >= 0 and y < self.height:
-            self.data[y][x] = color
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        if clip_x0 <= x < clip_x1 and clip_y0 <= y < clip_y1:
+            self.buffer[y * self.width + x] = pixel_value(color)
+            self.dirty_rows.add(y)
 
     def clear(self):
-        self.data = [
-            [(0, 0, 0) for _ in range(self.width)] for _ in range(self.height)
-        ]
+        self.buffer[:] = fill_bytes(PIXEL_OFF, len(self.buffer))
+        self.dirty_rows.update(range(self.height))
+
+    def draw_span(self, x, y, length, color):
+        """
+        Draws a horizontal run of pixels with a single slice write. Will not draw outside the clip rectangle.
+
+        :param x: The x-coordinate of the first pixel.
+        :type x
+        :param y: The y-coordinate of the row.
+        :type y
+        :param length: The number of pixels to draw.
+        :type length
+        :param color: The color of the pixels.
+        :type color
+        :return: None
+        :rtype: None
+        """
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        if y < clip_y0 or y >= clip_y1:
+            return
+        x0 = max(x, clip_x0)
+        x1 = min(x + length, clip_x1)
+        if x0 >= x1:
+            return
+        offset = y * self.width
+        self.buffer[offset + x0:offset + x1] = fill_bytes(pixel_value(color), x1 - x0)
+        self.dirty_rows.add(y)
+
+    def fill_rect(self, x, y, width, height, color):
+        """
+        Fills a rectangle, clipped once to the clip rectangle and written one row slice at a time.
+        Full width rectangles and single columns are written with a single slice.
+
+        :param x: The x-coordinate of the top-left corner of the rectangle.
+        :type x
+        :param y: The y-coordinate of the top-left corner of the rectangle.
+        :type y
+        :param width: The width of the rectangle.
+        :type width
+        :param height: The height of the rectangle.
+        :type height
+        :param color: The color of the rectangle.
+        :type color
+        :return: None
+        :rtype: None
+        """
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        x0 = max(x, clip_x0)
+        x1 = min(x + width, clip_x1)
+        y0 = max(y, clip_y0)
+        y1 = min(y + height, clip_y1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        value = pixel_value(color)
+        stride = self.width
+        buffer = self.buffer
+        if x1 - x0 == stride:
+            buffer[y0 * stride:y1 * stride] = fill_bytes(value, (y1 - y0) * stride)
+        elif x1 - x0 == 1:
+            buffer[y0 * stride + x0:(y1 - 1) * stride + x0 + 1:stride] = fill_bytes(value, y1 - y0)
+        else:
+            span = fill_bytes(value, x1 - x0)
+            for row in range(y0 * stride, y1 * stride, stride):
+                buffer[row + x0:row + x1] = span
+        self.dirty_rows.update(range(y0, y1))
+
+    def blit(self, image, x, y):
+        """
+        Copies another ImageSection into this one with its top left corner at the given coordinates,
+        one slice write per row. Will not draw outside the clip rectangle.
+
+        :param image: The image to copy.
+        :type image: ImageSection
+        :param x: The x-coordinate of the top left corner.
+        :type x
+        :param y: The y-coordinate of the top left corner.
+        :type y
+        :return: None
+        :rtype: None
+        """
+        clip_x0, clip_y0, clip_x1, clip_y1 = self.clip
+        x0 = max(x, clip_x0)
+        x1 = min(x + image.width, clip_x1)
+        y0 = max(y, clip_y0)
+        y1 = min(y + image.height, clip_y1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        source = memoryview(image.buffer)
+        source_width = image.width
+        width = self.width
+        for row in range(y0, y1):
+            start = (row - y) * source_width + x0 - x
+            self.buffer[row * width + x0:row * width + x1] = source[start:start + x1 - x0]
+        self.dirty_rows.update(range(y0, y1))
 
 
 class PngImage:
@@ -365,6 +567,40 @@ class PngImage:
         """
         self.data[y][x] = color
 
+    def draw_span(self, x , y , length , color ):
+        """
+        Draws a horizontal run of pixels. Will not draw outside the image boundaries.
+
+        :param x: The x-coordinate of the first pixel.
+        :type x
+        :param y: The y-coordinate of the row.
+        :type y
+        :param length: The number of pixels to draw.
+        :type length
+        :param color: The color of the pixels.
+        :type color
+        :return: None
+        :rtype: None
+        """
+        if y < 0 or y >= self.height:
+            return
+        row = self.data[y]
+        for i in range(max(x, 0), min(x + length, self.width)):
+            row[i] = color
+
+    def fill_rect(self, x , y , width , height , color ):
+        """
+        Fills a rectangle. Will not draw outside the image boundaries.
+        """
+        for row in range(max(y, 0), min(y + height, self.height)):
+            self.draw_span(x, row, width, color)
+
+    def visible(self, x , y , width , height ):
+        """
+        Returns True if any part of the given rectangle lies within the image boundaries.
+        """
+        return x < self.width and y < self.height and x + width > 0 and y + height > 0
+
     def save_png(self, filename )  :
         """
         Saves the image as a PNG file.
@@ -441,6 +677,119 @@ def scale_bitmap_font(font, char_width, char_height, scale_factor):
     return scaled_font
 
 
+# Pre-expanded glyphs by (char, scale), see get_glyph
+glyph_cache = {}
+
+
+def get_glyph(char, scale=1):
+    """
+    Returns a glyph of font_5x7 expanded to the given scale, as one tuple of (x, length) runs of lit
+    pixels per row. Glyphs are expanded once and cached.
+
+    :param char: The character to look up.
+    :type char
+    :param scale: The scale factor of the glyph.
+    :type scale
+    :return: The rows of runs, or None if the font has no such character.
+    :rtype: Tuple[Tuple[Tuple[int, int], ...], ...]
+    """
+    key = (char, scale)
+    if key in glyph_cache:
+        return glyph_cache[key]
+    bitmap = font_5x7.get(char)
+    glyph = None
+    if bitmap is not None:
+        char_width = 5
+        rows = []
+        for line in bitmap:
+            runs = []
+            start = None
+            for bit_position in range(char_width + 1):
+                lit = bit_position < char_width and (line >> (char_width - bit_position - 1)) & 1
+                if lit and start is None:
+                    start = bit_position
+                elif not lit and start is not None:
+                    runs.append((start * scale, (bit_position - start) * scale))
+                    start = None
+            rows.extend([tuple(runs)] * scale)
+        glyph = tuple(rows)
+    glyph_cache[key] = glyph
+    return glyph
+
+
+class TextStripCache:
+    """
+    Bounded LRU cache of rendered text strips, keyed by text, scale, colors and width.
+
+    A strip is an ImageSection holding the text drawn over its background color, as tall as the
+    tallest glyph. Labels and menu lines that come back often are then blitted instead of rasterized.
+    """
+
+    def __init__(self, max_bytes=256 * 1024):
+        # Upper bound for the pixel data held by the cache
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._strips = OrderedDict()
+
+    def get(self, text, scale, color, background_color, width):
+        """
+        Returns the strip for the given text, rendering and caching it on a miss.
+
+        :param text: The text of the strip.
+        :type text
+        :param scale: The scale factor for the text size.
+        :type scale
+        :param color: The color of the text.
+        :type color
+        :param background_color: The color behind the text.
+        :type background_color
+        :param width: The width of the strip, longer text is cut off.
+        :type width
+        :return: The rendered strip.
+        :rtype: ImageSection
+        """
+        key = (text, scale, color, background_color, width)
+        strip = self._strips.get(key)
+        if strip is not None:
+            self.hits += 1
+            self._strips.move_to_end(key)
+            return strip
+
+        self.misses += 1
+        strip = ImageSection(0, 0, width, FONT_MAX_ROWS * scale)
+        if pixel_value(background_color):
+            PngDrawing.draw_rectangle(strip, 0, 0, strip.width, strip.height, background_color)
+        PngDrawing.draw_text(strip, text, 0, 0, scale=scale, color=color)
+        self._strips[key] = strip
+        self.size += len(strip.buffer)
+        while self.size > self.max_bytes and len(self._strips) > 1:
+            _, evicted = self._strips.popitem(last=False)
+            self.size -= len(evicted.buffer)
+        return strip
+
+    def clear(self):
+        self._strips.clear()
+        self.size = 0
+
+    def stats(self):
+        """
+        Returns the hit and miss counters along with the number of strips and bytes held.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "strips": len(self._strips),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
 class PngDrawing:
 
     @staticmethod
@@ -463,8 +812,7 @@ class PngDrawing:
         """
 
         def draw_pixel(x , y , img , color )  :
-            image_data = img.data
-            if 0 <= x < len(image_data[0]) and 0 <= y < len(image_data):
+            if 0 <= x < img.width and 0 <= y < img.height:
                 img.draw_pixel(x, y, color)
 
         def draw_thick_pixel(
@@ -477,6 +825,23 @@ class PngDrawing:
         x1, y1 = point1
         x2, y2 = point2
 
+        if x1 == x2 or y1 == y2:
+            # Axis aligned lines are rectangles as wide as the thickness
+            low = -thickness // 2 + 1
+            high = thickness // 2
+            if high >= low:
+                img.fill_rect(
+                    min(x1, x2) + low,
+                    min(y1, y2) + low,
+                    abs(x2 - x1) + 1 + high - low,
+                    abs(y2 - y1) + 1 + high - low,
+                    color,
+                )
+            return
+        reach = max(thickness // 2, 1)
+        if not img.visible(min(x1, x2) - reach, min(y1, y2) - reach, abs(x2 - x1) + 2 * reach + 1, abs(y2 - y1) + 2 * reach + 1):
+            return
+
         dx = abs(x2 - x1)
         dy = abs(y2 - y1)
         sx = 1 if x1 < x2 else -1
@@ -519,6 +884,8 @@ class PngDrawing:
             return width
 
         icon_width = get_icon_width(icon)
+        if not img.visible(x, y, icon_width, len(icon)):
+            return
 
         for i, line in enumerate(icon):
             for bit_position in range(icon_width):
@@ -550,9 +917,7 @@ class PngDrawing:
         :return: None
         :rtype: None
         """
-        for i in range(height):
-            for j in range(width):
-                img.draw_pixel(x + j, y + i, color)
+        img.fill_rect(x, y, width, height, color)
 
     @staticmethod
     def draw_rectangle_outline(
@@ -615,6 +980,8 @@ class PngDrawing:
         :return: None
         :rtype: None
         """
+        if not img.visible(x - radius, y - radius, 2 * radius + 1, 2 * radius + 1):
+            return
         for i in range(-radius, radius + 1):
             for j in range(-radius, radius + 1):
                 if i ** 2 + j ** 2 <= radius ** 2:
@@ -642,6 +1009,8 @@ class PngDrawing:
         :return: None
         :rtype: None
         """
+        if not img.visible(x - radius, y - radius, 2 * radius + 1, 2 * radius + 1):
+            return
         x0, y0, radius = x, y, radius
         f = 1 - radius
         ddf_x = 1
@@ -683,7 +1052,6 @@ class PngDrawing:
         """Generate a rectangle with a gradient from start_color to end_color."""
         x1, y1 = start_point
         x2, y2 = end_point
-        img_data = img.data
         # Ensure coordinates are within image bounds and properly ordered
         x1, x2 = sorted([x1, x2])
         y1, y2 = sorted([y1, y2])
@@ -729,29 +1097,54 @@ class PngDrawing:
         :return: None
         :rtype: None
         """
-        char_width = 5
-        char_height = 7
-        spacing = spacing
-
-        if scale > 1:
-            font_5x7_scaled = scale_bitmap_font(
-                font_5x7, char_width, char_height, scale
-            )
-            char_width *= scale
-            char_height *= scale
-        else:
-            font_5x7_scaled = font_5x7
+        char_width = 5 * scale
         text = str(text)
         for i, char in enumerate(text):
-            if char in font_5x7_scaled:
-                character = font_5x7_scaled[char]
-                start_x = x + i * (char_width + spacing)
-                for j, line in enumerate(character):
-                    start_y = y + j
-                    for bit_position in range(char_width):
-                        bit = (line >> (char_width - bit_position - 1)) & 1
-                        if bool(bit):
-                            img.draw_pixel(start_x + bit_position, start_y, color)
+            glyph = get_glyph(char, scale)
+            start_x = x + i * (char_width + spacing)
+            if glyph is not None and img.visible(start_x, y, char_width, len(glyph)):
+                for j, runs in enumerate(glyph):
+                    for run_x, run_length in runs:
+                        img.draw_span(start_x + run_x, y + j, run_length, color)
+
+    @staticmethod
+    def draw_text_strip(
+        img ,
+        text ,
+        x ,
+        y ,
+        width ,
+        scale  = 1,
+        color  = (255, 255, 255),
+        background_color  = (0, 0, 0),
+    )  :
+        """
+        Draws text over its background color from text_strip_cache, rasterizing it only on a miss.
+        Everything within width and the font height is overwritten, including pixels around the glyphs.
+
+        :param img: The ImageSection on which to draw the text.
+        :type img 
+        :param text: The text to be drawn.
+        :type text 
+        :param x: The x-coordinate of the starting position of the text.
+        :type x 
+        :param y: The y-coordinate of the starting position of the text.
+        :type y 
+        :param width: The width of the strip, longer text is cut off.
+        :type width 
+        :param scale: The scale factor for the text size. Defaults to 1.
+        :type scale , optional
+        :param color: The color of the text. Defaults to (255, 255, 255).
+        :type color , optional
+        :param background_color: The color behind the text. Defaults to (0, 0, 0).
+        :type background_color , optional
+        :return: None
+        :rtype: None
+        """
+        if width <= 0:
+            return
+        strip = text_strip_cache.get(str(text), scale, color, background_color, width)
+        img.blit(strip, x, y)
 
     @staticmethod
     def draw_fader(image , value , x , y , width  = 9, height  = 45, color  = (255,255,255)):
@@ -909,3 +1302,6 @@ class PngDrawing:
         else:
             PngDrawing.draw_circle(image, x + radius, y + radius, radius, color)
             PngDrawing.draw_line(image, (x + radius, y + radius), (x_end, y_end), (0,0,0), 1)
+
+
+text_strip_cache = TextStripCache()
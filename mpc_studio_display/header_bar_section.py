@@ -9,9 +9,9 @@ class HeaderBarSection(Element):
     """
     def __init__(self, name, title, x=0, y=0, width = DISPLAY_WIDTH, height= 12):
         super().__init__(name, x, y, width, height)
-        self.left_text = TextElement(f"{title}_title", title, x + 2, y + 1, 120, height - 2)
-        self.center_text = TextElement(f"{title}_center", "Center Text", x + 120, y + 1, 120, height - 2)
-        self.right_text = TextElement(f"{title}_right", "Right Text", x + 240, y + 1, 120, height - 2)
+        self.add_element(TextElement(f"{title}_title", title, x + 2, y + 1, 120, height - 2), "left_text")
+        self.add_element(TextElement(f"{title}_center", "Center Text", x + 120, y + 1, 120, height - 2), "center_text")
+        self.add_element(TextElement(f"{title}_right", "Right Text", x + 240, y + 1, 120, height - 2), "right_text")
 
     def render(self):
         PngDrawing.draw_line(self, (0, self.height-1), (DISPLAY_WIDTH, self.height-1), (255, 255, 255))
@@ -0,0 +1,98 @@
+try:
+    import rtmidi
+except ImportError:
+    rtmidi = None
+
+try:
+    import mido
+except ImportError:
+    mido = None
+
+from .sysex import SYSEX_START_BYTE, SYSEX_END_BYTE
+
+
+class RtMidiOutput:
+    """
+    Writes sysex straight to a python-rtmidi MidiOut. Display messages go out from the buffer they
+    were assembled in, without building a mido Message for every row.
+
+    :param midi_out: An open rtmidi.MidiOut, or anything with a compatible send_message.
+    :type midi_out
+    """
+
+    name = "rtmidi"
+
+    def __init__(self, midi_out) -> None:
+        self.midi_out = midi_out
+
+    @classmethod
+    def open(cls, port_name):
+        midi_out = rtmidi.MidiOut()
+        ports = midi_out.get_ports()
+        if port_name not in ports:
+            raise IOError(f"Unknown MIDI output {port_name!r}")
+        midi_out.open_port(ports.index(port_name))
+        return cls(midi_out)
+
+    def send_sysex(self, data):
+        """
+        Sends a sysex message given without its start and end bytes, like mido takes it.
+        """
+        self.midi_out.send_message([SYSEX_START_BYTE, *data, SYSEX_END_BYTE])
+
+    def send_payload(self, payload):
+        """
+        Sends a DisplayMessage.
+        """
+        self.midi_out.send_message(payload.message)
+
+    def close(self):
+        self.midi_out.close_port()
+
+
+class MidoOutput:
+    """
+    Sends sysex through a mido output port, one mido Message per row.
+
+    :param port: An open mido output port.
+    :type port
+    """
+
+    name = "mido"
+
+    def __init__(self, port) -> None:
+        self.port = port
+
+    @classmethod
+    def open(cls, port_name):
+        return cls(mido.open_output(port_name))
+
+    def send_sysex(self, data):
+        self.port.send(mido.Message("sysex", data=data))
+
+    def send_payload(self, payload):
+        self.port.send(mido.Message("sysex", data=payload.data))
+
+    def close(self):
+        self.port.close()
+
+
+def open_display_output(port_name, backend=None):
+    """
+    Opens a MIDI output for the display, with python-rtmidi when it is installed and mido otherwise.
+
+    :param port_name: The name of the output, as listed by mido.get_output_names().
+    :type port_name
+    :param backend: "rtmidi" or "mido" to force a backend.
+    :type backend
+    :return: An RtMidiOutput or MidoOutput.
+    """
+    if backend is None:
+        backend = "rtmidi" if rtmidi is not None else "mido"
+    if backend == "rtmidi":
+        if rtmidi is None:
+            raise ImportError("python-rtmidi is not installed")
+        return RtMidiOutput.open(port_name)
+    if mido is None:
+        raise ImportError("mido is not installed")
+    return MidoOutput.open(port_name)
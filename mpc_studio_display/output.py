@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from .sysex import DisplayMessage
+
+
+def payload_key(payload):
+    """
+    Returns the (y, x, pixel count) a display payload covers, read from its header.
+    """
+    return (
+        (payload[4] << 7) | payload[5],
+        (payload[2] << 7) | payload[3],
+        (payload[0] << 7) | payload[1],
+    )
+
+
+class OutputWriter:
+    """
+    Sends display payloads from a background thread, so rendering never waits on the MIDI port.
+
+    Pending payloads are keyed by the row and column span they cover. A payload for a span that is
+    still waiting to go out replaces the older one, which is dropped, and is queued behind everything
+    already pending so that no older payload can overwrite it on the device.
+
+    DisplayMessages are copied into messages of the writer's own, which are reused once sent, so
+    submitting a row does not allocate once the pool has grown to the number of rows in flight.
+    Like the display's, a DisplayMessage handed to send only holds its content during the call.
+
+        writer = OutputWriter(send_payload)
+        writer.start()
+        display = Display(send_payload=writer.submit)
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self.sent = 0
+        self.dropped = 0
+        # Called when a payload is queued while nothing was pending, from the submitting thread
+        self.on_pending = None
+        self._queue = OrderedDict()
+        # Sent DisplayMessages, ready to take the copy of the next one submitted
+        self._free = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def __call__(self, payload):
+        self.submit(payload)
+
+    def submit(self, payload):
+        """
+        Queues a payload, superseding any pending payload for the same row and span. A DisplayMessage
+        is copied, since the display reuses it for the next update of the row.
+        """
+        key = payload_key(payload)
+        with self._condition:
+            pending = self._queue.pop(key, None)
+            if pending is not None:
+                self.dropped += 1
+            if isinstance(payload, DisplayMessage):
+                # The superseded message is rewritten in place, otherwise a sent one is reused
+                if not isinstance(pending, DisplayMessage):
+                    pending = self._free.pop() if self._free else None
+                payload = payload.copy(pending)
+            was_empty = not self._queue
+            self._queue[key] = payload
+            self._condition.notify()
+        if was_empty and self.on_pending is not None:
+            self.on_pending()
+
+    @property
+    def queue_depth(self):
+        with self._condition:
+            return len(self._queue)
+
+    def stats(self):
+        """
+        Returns the number of payloads pending, sent and dropped because a newer one replaced them.
+        """
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "sent": self.sent,
+                "dropped": self.dropped,
+            }
+
+    def send_pending(self, max_messages=None):
+        """
+        Sends pending payloads from the calling thread, oldest first.
+
+        :param max_messages: The most payloads to send, defaults to all of them.
+        :type max_messages
+        :return: The number of payloads sent.
+        :rtype: int
+        """
+        count = 0
+        while max_messages is None or count < max_messages:
+            with self._condition:
+                if not self._queue:
+                    break
+                _, payload = self._queue.popitem(last=False)
+            self.send(payload)
+            with self._condition:
+                self.__sent(payload)
+            count += 1
+        return count
+
+    def start(self):
+        """
+        Starts the writer thread.
+        """
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self.__run, name="OutputWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain=True):
+        """
+        Stops the writer thread, after sending whatever is pending unless drain is False.
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._running = False
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def __run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                _, payload = self._queue.popitem(last=False)
+            self.send(payload)
+            with self._condition:
+                self.__sent(payload)
+
+    def __sent(self, payload):
+        # Called with the lock held
+        self.sent += 1
+        if isinstance(payload, DisplayMessage):
+            self._free.append(payload)
+
+
+class ByteBudget:
+    """
+    Token bucket limiting the bytes sent per second to what the link to the device sustains.
+
+    Bytes can be consumed beyond what is available, the debt is paid back before anything is
+    available again. This lets urgent updates through at once while holding back the optional ones.
+
+    :param rate: Bytes per second.
+    :type rate
+    :param burst: The most bytes that can build up while idle, defaults to a tenth of a second's worth.
+    :type burst
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate / 10
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def available(self):
+        """
+        Returns the bytes that can be sent right now, negative while in debt.
+        """
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self._tokens
+
+    def consume(self, count):
+        self.available()
+        self._tokens -= count
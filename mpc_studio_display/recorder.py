@@ -0,0 +1,196 @@
+import asyncio
+import struct
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import mido
+except ImportError:
+    mido = None
+
+# First bytes of every session log
+LOG_MAGIC = b"MPCSLOG\x01"
+# Entry header: kind, microseconds since the previous entry and length of the data that follows
+ENTRY_HEADER = struct.Struct(">BIH")
+MAX_DELTA_US = 0xFFFFFFFF
+INPUT = 0
+OUTPUT = 1
+
+# One recorded MIDI message or display payload. time is in seconds since the recording started.
+LogEntry = namedtuple("LogEntry", ["kind", "time", "data"])
+
+
+class SessionRecorder:
+    """
+    Records the incoming MIDI messages and the outgoing display payloads of a session to a compact
+    binary log, with monotonic timestamps. Recording is safe from the MIDI callback thread and the
+    display at the same time.
+
+        recorder = SessionRecorder(open("session.log", "wb"))
+        display = Display(send_payload=recorder.wrap_output(writer.submit))
+        runtime.attach_input(in_port, recorder.wrap_input(runtime.feed))
+        ...
+        recorder.close()
+    """
+
+    def __init__(self, file) -> None:
+        self.file = file
+        self.entries = 0
+        self._lock = threading.Lock()
+        self._last = time.monotonic()
+        file.write(LOG_MAGIC)
+
+    def record(self, kind, data):
+        data = bytes(data)
+        with self._lock:
+            now = time.monotonic()
+            delta = min(int((now - self._last) * 1e6), MAX_DELTA_US)
+            # Keep the rounding error of each delta in the clock instead of losing it
+            self._last += delta / 1e6
+            self.file.write(ENTRY_HEADER.pack(kind, delta, len(data)))
+            self.file.write(data)
+            self.entries += 1
+
+    def record_input(self, msg):
+        self.record(INPUT, msg.bytes())
+
+    def record_output(self, payload):
+        self.record(OUTPUT, payload)
+
+    def wrap_input(self, callback):
+        """
+        Returns a callable recording each MIDI message before passing it to callback.
+        """
+        def record_input(msg):
+            self.record_input(msg)
+            return callback(msg)
+        return record_input
+
+    def wrap_output(self, send_payload):
+        """
+        Returns a callable recording each display payload before passing it to send_payload.
+        """
+        def record_output(payload):
+            self.record_output(payload)
+            return send_payload(payload)
+        return record_output
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+def read_log(file):
+    """
+    Yields the LogEntry items of a session log.
+
+    :param file: A binary file opened for reading.
+    :type file
+    """
+    if file.read(len(LOG_MAGIC)) != LOG_MAGIC:
+        raise ValueError("Not a session log")
+    elapsed_us = 0
+    while True:
+        header = file.read(ENTRY_HEADER.size)
+        if len(header) < ENTRY_HEADER.size:
+            return
+        kind, delta, length = ENTRY_HEADER.unpack(header)
+        elapsed_us += delta
+        yield LogEntry(kind, elapsed_us / 1e6, file.read(length))
+
+
+class RecordedMessage:
+    """
+    A recorded MIDI message, used when mido is not available. Offers msg.bytes() like a mido message.
+    """
+
+    def __init__(self, data) -> None:
+        self.data = bytes(data)
+
+    def bytes(self):
+        return list(self.data)
+
+    def __repr__(self) -> str:
+        return f"RecordedMessage({self.data.hex(' ')})"
+
+
+def to_message(data):
+    if mido is not None:
+        return mido.Message.from_bytes(data)
+    return RecordedMessage(data)
+
+
+class SessionReplayer:
+    """
+    Feeds the MIDI input of a recorded session back into a ControllerRuntime.
+
+    Frame ticks happen on the recorded timeline rather than the wall clock, so a replay produces the
+    same display traffic whatever its speed. Point the display at a DisplayEmulator to measure it.
+
+        replayer = SessionReplayer.load("session.log")
+        result = asyncio.run(replayer.play(runtime, speed=None))
+    """
+
+    def __init__(self, entries) -> None:
+        self.entries = list(entries)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(read_log(f))
+
+    @property
+    def inputs(self):
+        return [entry for entry in self.entries if entry.kind == INPUT]
+
+    @property
+    def outputs(self):
+        return [entry for entry in self.entries if entry.kind == OUTPUT]
+
+    @property
+    def duration(self):
+        return self.entries[-1].time if self.entries else 0.0
+
+    async def play(self, runtime, speed=1.0):
+        """
+        Dispatches the recorded input to the runtime, ticking it once per frame of the recording.
+
+        :param runtime: The ControllerRuntime to feed, it does not need to be running.
+        :type runtime
+        :param speed: Playback speed, 2.0 plays twice as fast. None plays without waiting.
+        :type speed
+        :return: The number of inputs and ticks, wall time and the time spent in each tick.
+        :rtype: dict
+        """
+        frame = 1.0 / (runtime.display.frame_rate or 60)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tick_times = []
+        next_tick = frame
+
+        async def tick_until(until):
+            nonlocal next_tick
+            while next_tick <= until:
+                if speed:
+                    await asyncio.sleep(max(0.0, start + next_tick / speed - loop.time()))
+                tick_start = time.perf_counter()
+                await runtime.tick()
+                tick_times.append(time.perf_counter() - tick_start)
+                next_tick += frame
+
+        inputs = self.inputs
+        for entry in inputs:
+            await tick_until(entry.time)
+            if speed:
+                await asyncio.sleep(max(0.0, start + entry.time / speed - loop.time()))
+            await runtime.dispatch(to_message(entry.data))
+        await tick_until(next_tick)
+        tick_times.sort()
+        return {
+            "inputs": len(inputs),
+            "ticks": len(tick_times),
+            "wall_time": loop.time() - start,
+            "tick_median": tick_times[len(tick_times) // 2] if tick_times else 0.0,
+            "tick_max": tick_times[-1] if tick_times else 0.0,
+        }
@@ -0,0 +1,246 @@
+import asyncio
+import inspect
+import logging
+from .util import endless_encoder
+
+logger = logging.getLogger(__name__)
+
+
+async def _call(callback, *args):
+    result = callback(*args)
+    if inspect.isawaitable(result):
+        await result
+
+
+class EncoderAccumulator:
+    """
+    Sums the relative movement of endless encoders per control between two ticks, so a fast spin is
+    handled as one net movement instead of one update per detent.
+    """
+
+    def __init__(self, decode=endless_encoder):
+        # Turns a control change value into a relative movement
+        self.decode = decode
+        self.handlers = {}
+        self._deltas = {}
+
+    def add_encoder(self, control_id, handler):
+        """
+        Registers a callable receiving the net movement of a control change, once per tick.
+        It can be a coroutine function.
+        """
+        self.handlers[control_id] = handler
+        return handler
+
+    def handle(self, msg):
+        """
+        Accumulates a message if it is a control change of a registered encoder.
+
+        :return: True if the message was consumed.
+        :rtype: bool
+        """
+        data = msg.bytes()
+        if len(data) != 3 or data[0] & 0xF0 != 0xB0 or data[1] not in self.handlers:
+            return False
+        self._deltas[data[1]] = self._deltas.get(data[1], 0) + self.decode(data[2])
+        return True
+
+    async def dispatch(self):
+        """
+        Passes the movement accumulated since the last dispatch to each encoder's handler.
+        """
+        deltas = self._deltas
+        self._deltas = {}
+        for control_id, delta in deltas.items():
+            if delta:
+                await _call(self.handlers[control_id], delta)
+
+
+class ControllerRuntime:
+    """
+    Runs the controller on an asyncio event loop.
+
+    MIDI input is delivered by the port's callback thread into a queue and dispatched on the loop, the
+    display is flushed on a frame tick and pending output is paced out through an OutputWriter.
+    Encoders registered with add_encoder are coalesced and handled once per frame tick. All
+    Element state is only ever touched from the loop, so handlers, timers and animations can run
+    side by side without locking. An exception raised by a handler, a timer or a frame tick is
+    logged and the runtime carries on with the next message or tick.
+
+        runtime = ControllerRuntime(display, output=writer)
+        runtime.add_handler(handle_message)
+        runtime.attach_input(in_port)
+        asyncio.run(runtime.run())
+    """
+
+    def __init__(self, display, output=None, output_interval=0.002, messages_per_tick=None):
+        self.display = display
+        # OutputWriter drained by the runtime, it should not run its own thread
+        self.output = output
+        # Seconds between two output drains and the most payloads sent per drain
+        self.output_interval = output_interval
+        self.messages_per_tick = messages_per_tick
+        self.handlers = []
+        self.timers = []
+        self.encoders = EncoderAccumulator()
+        # Input ports and the callback each is given while the runtime runs, see attach_input
+        self.inputs = []
+        self._loop = None
+        self._queue = None
+        self._stopped = None
+        # Set when the output queue goes from empty to pending, see OutputWriter.on_pending
+        self._output_pending = None
+        # send_pending call running on the executor, if any
+        self._output_drain = None
+
+    def add_handler(self, handler):
+        """
+        Adds a callable receiving every incoming MIDI message. It can be a coroutine function.
+        """
+        self.handlers.append(handler)
+        return handler
+
+    def add_encoder(self, control_id, handler):
+        """
+        Handles a control change as an endless encoder, see EncoderAccumulator. Its messages no longer
+        reach the other handlers.
+        """
+        return self.encoders.add_encoder(control_id, handler)
+
+    def every(self, interval, callback):
+        """
+        Calls callback every interval seconds while the runtime runs. It can be a coroutine function.
+        """
+        self.timers.append((interval, callback))
+        return callback
+
+    def attach_input(self, port, callback=None):
+        """
+        Feeds the messages of a mido input port to the runtime through its callback. The callback is
+        only set while the runtime runs, so no message arrives before there is a loop to queue it on.
+
+        :param callback: Receives each message in place of feed, for instance to record it before
+            passing it on to feed.
+        :type callback
+        """
+        self.inputs.append((port, callback if callback is not None else self.feed))
+
+    def feed(self, msg):
+        """
+        Queues an incoming message for dispatch. Safe to call from any thread.
+        """
+        loop = self._loop
+        if loop is None:
+            raise RuntimeError("ControllerRuntime is not running")
+        loop.call_soon_threadsafe(self._queue.put_nowait, msg)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def run(self):
+        """
+        Runs input dispatch, the frame tick, output pacing and the timers until stop is called.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopped = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self.__dispatch_input()),
+            asyncio.create_task(self.__tick_display()),
+        ]
+        if self.output is not None:
+            self._output_pending = asyncio.Event()
+            self.output.on_pending = self.__notify_output
+            # Payloads queued before the callback was set would otherwise never be announced
+            if self.output.queue_depth:
+                self._output_pending.set()
+            tasks.append(asyncio.create_task(self.__pace_output()))
+        for interval, callback in self.timers:
+            tasks.append(asyncio.create_task(self.__run_timer(interval, callback)))
+        for port, callback in self.inputs:
+            port.callback = callback
+        try:
+            await self._stopped.wait()
+        finally:
+            for port, _ in self.inputs:
+                port.callback = None
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Cancelling the pacing task does not stop a drain already running on the executor, it
+            # has to finish before the last drain so the port is never written from two threads
+            if self._output_drain is not None:
+                await asyncio.gather(self._output_drain, return_exceptions=True)
+                self._output_drain = None
+            await self.tick()
+            if self.output is not None:
+                self.output.on_pending = None
+                self.output.send_pending()
+            self._loop = None
+
+    async def dispatch(self, msg):
+        """
+        Passes a message to every handler in turn, awaiting the coroutine ones.
+        """
+        if self.encoders.handle(msg):
+            return
+        for handler in self.handlers:
+            await _call(handler, msg)
+
+    async def __dispatch_input(self):
+        while True:
+            msg = await self._queue.get()
+            try:
+                await self.dispatch(msg)
+            except Exception:
+                logger.exception("Error handling %r", msg)
+
+    async def tick(self):
+        """
+        Handles the encoder movement accumulated since the last tick and flushes the display.
+        """
+        await self.encoders.dispatch()
+        self.display.flush()
+
+    async def __tick_display(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Error in frame tick")
+            await asyncio.sleep(1.0 / (self.display.frame_rate or 60))
+
+    def __notify_output(self):
+        self._loop.call_soon_threadsafe(self._output_pending.set)
+
+    async def __drain_output(self):
+        self._output_drain = self._loop.run_in_executor(None, self.output.send_pending, self.messages_per_tick)
+        # Shielded so that cancelling the pacing task leaves the drain for run() to wait on
+        sent = await asyncio.shield(self._output_drain)
+        self._output_drain = None
+        return sent
+
+    async def __pace_output(self):
+        while True:
+            await self._output_pending.wait()
+            self._output_pending.clear()
+            try:
+                # Drain until empty, payloads queued meanwhile do not set the event again
+                while await self.__drain_output():
+                    await asyncio.sleep(self.output_interval)
+            except Exception:
+                self._output_drain = None
+                logger.exception("Error sending display output")
+                # Retry what is still queued, a frame later so a failing port is not hammered
+                if self.output.queue_depth:
+                    await asyncio.sleep(1.0 / (self.display.frame_rate or 60))
+                    self._output_pending.set()
+
+    async def __run_timer(self, interval, callback):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await _call(callback)
+            except Exception:
+                logger.exception("Error in timer %r", callback)
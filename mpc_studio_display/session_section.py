@@ -15,7 +15,7 @@ class SessionTrackElement(Element):
         self._state = state
 
         self._track_name = name
-        self.track_name_element = TextElement("track_name_element", self._track_name, self.x_pos + 2, self.y_pos, 59, 13, selected=False)
+        self.add_element(TextElement("track_name_element", self._track_name, self.x_pos + 2, self.y_pos, 59, 13, selected=False))
 
         # Add clipslot elements
         self.clips = []
@@ -80,7 +80,7 @@ class SessionTrackElement(Element):
     def track_name(self, value):
         self._track_name = value
         self.track_name_element.text = value
-        self.render()
+        self.invalidate()
 
     @property
     def state(self):
@@ -90,7 +90,7 @@ class SessionTrackElement(Element):
     def state(self, value):
         if value != self._state:
             self._state = value
-            self.render()
+            self.invalidate()
 
     def render(self):
         renderer = self.render_mapping[self._state]
@@ -110,10 +110,8 @@ class SessionSection(Element):
 class TrackDetailsSection(Element):
     def __init__(self) -> None:
         super().__init__("track_details_section", 241, 14, 119, 96)
-        self.track_name = TextElement("track_name", "Track Name", self.x_pos, self.y_pos, 119, 12)
-        self.meter_element = MeterElement(self.x_pos + 25, self.y_pos + 17, 18, 62)
-        self.add_element(self.meter_element)
-        self.add_element(self.track_name)
+        self.add_element(MeterElement(self.x_pos + 25, self.y_pos + 17, 18, 62))
+        self.add_element(TextElement("track_name", "Track Name", self.x_pos, self.y_pos, 119, 12))
 
         self._mute = False
         self._solo = False
@@ -122,11 +120,11 @@ class TrackDetailsSection(Element):
     
     def set_pan_float(self, value):
         self._pan = value
-        self.render()
+        self.invalidate()
     
     def set_pan_from_midi(self, value):
         self._pan = value / 127
-        self.render()
+        self.invalidate()
 
     @property
     def arm(self):
@@ -135,7 +133,7 @@ class TrackDetailsSection(Element):
     @arm.setter
     def arm(self, value):
         self._arm = value
-        self.render()
+        self.invalidate()
 
     @property
     def pan(self):
@@ -144,7 +142,7 @@ class TrackDetailsSection(Element):
     @pan.setter
     def pan(self, value):
         self._pan = value
-        self.render()
+        self.invalidate()
 
     @property
     def mute(self):
@@ -153,7 +151,7 @@ class TrackDetailsSection(Element):
     @mute.setter
     def mute(self, value):
         self._mute = value
-        self.render()
+        self.invalidate()
 
     @property
     def solo(self):
@@ -162,7 +160,7 @@ class TrackDetailsSection(Element):
     @solo.setter
     def solo(self, value):
         self._solo = value
-        self.render()   
+        self.invalidate()   
 
     def __draw_button(self, x, y, width, height, text, pressed=False):
         color = (0, 0, 0) if pressed else (255, 255, 255)
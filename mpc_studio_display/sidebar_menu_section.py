@@ -20,7 +20,7 @@ class SidebarMenuSection(Element):
             self.line_texts[line_index] = text
             if selected_line_index is not None:
                 self.__selected_line = selected_line_index
-            self.render()
+            self.invalidate()
 
     def get_line_text(self, line_index):
         """
@@ -38,7 +38,7 @@ class SidebarMenuSection(Element):
             self.line_texts = texts
             if selected_line_index is not None:
                 self.__selected_line = selected_line_index
-            self.render()
+            self.invalidate()
         else:
             raise ValueError(f"Expected {self.__lines} texts, got {len(texts)}")
 
@@ -63,7 +63,7 @@ class SidebarMenuSection(Element):
         """
         # clamp the line index to the valid range
         self.__selected_line = max(0, min(line_index, self.__lines - 1))
-        self.render()
+        self.invalidate()
 
     def increment_selected_line(self):
         """
@@ -88,5 +88,5 @@ class SidebarMenuSection(Element):
                 bg_color = (255, 255, 255)
 
             PngDrawing.draw_rectangle(self, 0, i * 12 , self.width - 1, 12, bg_color)
-            PngDrawing.draw_text(self, text, 2, i * 12 + 2, color=text_color)
+            PngDrawing.draw_text_strip(self, text, 2, i * 12 + 2, self.width - 3, color=text_color, background_color=bg_color)
         super().render()
\ No newline at end of file
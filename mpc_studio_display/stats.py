@@ -0,0 +1,117 @@
+import time
+
+
+class ElementStats:
+    """
+    Counters of one element.
+
+    Draw time is that of the element's renders. Rows, bytes and encode and send time are those of the
+    display rows the element changed. A row changed by several elements is counted for each of them.
+    """
+
+    __slots__ = (
+        "renders", "draw_time", "encode_time", "send_time",
+        "rows_sent", "redundant_rows", "messages", "bytes",
+    )
+
+    def __init__(self):
+        self.renders = 0
+        self.draw_time = 0.0
+        self.encode_time = 0.0
+        self.send_time = 0.0
+        self.rows_sent = 0
+        self.redundant_rows = 0
+        self.messages = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class RenderStats:
+    """
+    Collects render, encode and send timings of a Display. Only exists while instrumentation is
+    enabled, see Display.enable_stats.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.elements = {}
+        # Display wide totals, every row is counted once
+        self.total = ElementStats()
+        self.compose_time = 0.0
+        self.presents = 0
+        # Elements that changed each row of the present in progress
+        self._row_owners = {}
+
+    def element(self, element):
+        stats = self.elements.get(element)
+        if stats is None:
+            stats = self.elements[element] = ElementStats()
+        return stats
+
+    def render(self, element):
+        """
+        Renders an element, recording how long its drawing took.
+        """
+        start = time.perf_counter()
+        try:
+            element.render()
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.element(element)
+            stats.renders += 1
+            stats.draw_time += elapsed
+            self.total.renders += 1
+            self.total.draw_time += elapsed
+
+    def rows_changed(self, element, rows):
+        for y in rows:
+            self._row_owners.setdefault(y, []).append(element)
+
+    def composed(self, elapsed):
+        self.presents += 1
+        self.compose_time += elapsed
+
+    def row_done(self, y, encode_time, send_time=0.0, messages=0, sent=0):
+        """
+        Records the outcome of a composed row. A row without messages was unchanged on the device.
+
+        :param sent: The bytes the messages took on the wire.
+        :type sent
+        """
+        owners = [self.element(element) for element in self._row_owners.pop(y, ())]
+        for stats in owners + [self.total]:
+            stats.encode_time += encode_time
+            stats.send_time += send_time
+            if messages:
+                stats.rows_sent += 1
+                stats.messages += messages
+                stats.bytes += sent
+            else:
+                stats.redundant_rows += 1
+
+    def snapshot(self, pages):
+        """
+        Returns the counters as plain dicts. Elements are keyed by their path from the page,
+        like "session/track_details_section/meter_element".
+        """
+        elements = {}
+        for page in pages:
+            for path, element in _walk_paths(page, page.name):
+                if element in self.elements:
+                    elements[path] = self.elements[element].as_dict()
+        return {
+            "presents": self.presents,
+            "compose_time": self.compose_time,
+            "total": self.total.as_dict(),
+            "elements": elements,
+        }
+
+
+def _walk_paths(element, path):
+    yield path, element
+    for name, child in element.elements.items():
+        yield from _walk_paths(child, f"{path}/{name}")
@@ -0,0 +1,138 @@
+from .encoding import PAYLOAD_HEADER_SIZE
+
+SYSEX_START_BYTE = 0xF0
+MANUFACTURE_ID = 0x47
+CATEGORY_ID = 0x7F
+PRODUCT_ID = 0x3D
+MSG_TYPE_MODE = 0x62
+MODE_PRIVATE = 0x61
+MODE_PUBLIC = 0x02
+MSG_TYPE_DISPLAY = 0x04
+MSG_TYPE_PING = 0x52
+SYSEX_END_BYTE = 0xF7
+SYSEX_HEADER = (MANUFACTURE_ID, CATEGORY_ID, PRODUCT_ID)
+SYSEX_END = (0xF7,)
+
+# msb/lsb pair of every 14-bit value, as used for lengths and coordinates
+MSB_LSB = tuple(bytes((value >> 7, value & 0x7F)) for value in range(1 << 14))
+
+# Layout of a display message: sysex start, header, message id, message length, payload, sysex end
+LENGTH_OFFSET = 1 + len(SYSEX_HEADER) + 1
+PAYLOAD_OFFSET = LENGTH_OFFSET + 2
+
+
+def sysex_data(msg_id, payload):
+    """
+    Returns the data of a sysex message, without the start and end bytes, as mido expects it.
+
+    :param msg_id: The message type, like MSG_TYPE_MODE.
+    :type msg_id
+    :param payload: The message payload.
+    :type payload: tuple
+    :rtype: tuple
+    """
+    return SYSEX_HEADER + (msg_id,) + tuple(MSB_LSB[len(payload)]) + payload
+
+
+class DisplayMessage:
+    """
+    A display row update assembled in place in a preallocated buffer, sysex framing included.
+
+    It reads like the display payload it carries (pixel count, x and y as msb/lsb pairs followed by
+    the pixel bytes), so len(), indexing and bytes() give the payload. data and message are views of
+    the framed sysex, ready for a MIDI port without another copy.
+
+    The Display reuses one message per row, so its content only holds during the send_payload call.
+    Use copy() to keep it.
+    """
+
+    __slots__ = ("buffer", "length", "_view")
+
+    def __init__(self, capacity) -> None:
+        """
+        :param capacity: The most pixel bytes a message carries.
+        :type capacity
+        """
+        self.buffer = bytearray(PAYLOAD_OFFSET + PAYLOAD_HEADER_SIZE + capacity + 1)
+        self.buffer[:LENGTH_OFFSET] = bytes((SYSEX_START_BYTE,) + SYSEX_HEADER + (MSG_TYPE_DISPLAY,))
+        self.length = 0
+        self._view = memoryview(self.buffer)
+
+    def write(self, width, x, y, pixels):
+        """
+        Fills in the message for a row span.
+
+        :param width: The pixel count of the span.
+        :type width
+        :param x: The x-coordinate of the first pixel.
+        :type x
+        :param y: The row.
+        :type y
+        :param pixels: The encoded pixel bytes.
+        :type pixels: bytes-like
+        :return: The message itself.
+        :rtype: DisplayMessage
+        """
+        buffer = self.buffer
+        end = PAYLOAD_OFFSET + PAYLOAD_HEADER_SIZE + len(pixels)
+        self.length = end - PAYLOAD_OFFSET
+        buffer[LENGTH_OFFSET:PAYLOAD_OFFSET] = MSB_LSB[self.length]
+        buffer[PAYLOAD_OFFSET:PAYLOAD_OFFSET + 2] = MSB_LSB[width]
+        buffer[PAYLOAD_OFFSET + 2:PAYLOAD_OFFSET + 4] = MSB_LSB[x]
+        buffer[PAYLOAD_OFFSET + 4:PAYLOAD_OFFSET + 6] = MSB_LSB[y]
+        buffer[PAYLOAD_OFFSET + PAYLOAD_HEADER_SIZE:end] = pixels
+        buffer[end] = SYSEX_END_BYTE
+        return self
+
+    @property
+    def payload(self):
+        return self._view[PAYLOAD_OFFSET:PAYLOAD_OFFSET + self.length]
+
+    @property
+    def data(self):
+        """
+        The sysex message without its start and end bytes, as mido expects it.
+        """
+        return self._view[1:PAYLOAD_OFFSET + self.length]
+
+    @property
+    def message(self):
+        """
+        The complete sysex message, start and end bytes included.
+        """
+        return self._view[:PAYLOAD_OFFSET + self.length + 1]
+
+    @property
+    def capacity(self):
+        return len(self.buffer) - PAYLOAD_OFFSET - PAYLOAD_HEADER_SIZE - 1
+
+    def copy(self, into=None):
+        """
+        Returns a copy of the message, with the same capacity.
+
+        :param into: A DisplayMessage to copy into instead of allocating one. It is only used if it
+            can hold this message.
+        :type into: DisplayMessage
+        :rtype: DisplayMessage
+        """
+        if into is None or into.capacity < self.length - PAYLOAD_HEADER_SIZE:
+            into = DisplayMessage(self.capacity)
+        end = PAYLOAD_OFFSET + self.length + 1
+        into.buffer[:end] = self._view[:end]
+        into.length = self.length
+        return into
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return self.payload[index]
+
+    def __iter__(self):
+        return iter(self.payload)
+
+    def __bytes__(self):
+        return bytes(self.payload)
+
+    def __repr__(self) -> str:
+        return f"DisplayMessage({bytes(self.payload).hex(' ')})"
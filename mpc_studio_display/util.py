@@ -7,4 +7,11 @@ def message_length(message):
         clamp(length // 128, 0, 127), length % 128)
 
 def msblsb(number):
-    return (clamp(number // 128, 0, 127), number % 128)
\ No newline at end of file
+    return (clamp(number // 128, 0, 127), number % 128)
+
+def endless_encoder(midi_value):
+    direction = not midi_value >> 6
+    amount = midi_value & 0b0111111
+    if not direction:
+        amount = amount - 64
+    return amount